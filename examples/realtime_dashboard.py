@@ -40,6 +40,8 @@ from ebpf_probes import EBPFProbeManager
 from slurm_integration import SlurmIntegration
 from data_analyzer import JobAnalyzer, JobClassifier
 
+BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 class RealTimeMonitor:
     """
     Real-time monitoring with interactive dashboard
@@ -418,11 +420,9 @@ Net Bytes: {self._format_bytes(metrics.get('total_net_bytes', 0))}
         Format bytes in human readable format
         """
         
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_val < 1024.0:
-                return f"{bytes_val:.1f} {unit}"
-            bytes_val /= 1024.0
-        return f"{bytes_val:.1f} PB"
+        # Each unit is 10 bits wider than the previous one
+        unit = min(max(0, (int(bytes_val).bit_length() - 1) // 10), len(BYTE_UNITS) - 1)
+        return f"{bytes_val / (1 << (unit * 10)):.1f} {BYTE_UNITS[unit]}"
     
     def _start_simple_monitoring(self, job_ids: Optional[List[str]] = None, user: Optional[str] = None):
         """
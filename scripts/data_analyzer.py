@@ -12,14 +12,167 @@ License: MIT
 import logging
 import statistics
 import time
-from collections import defaultdict
 from typing import Dict, List, Set, Tuple, Optional
 
 import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+
+def _aggregate_io_loop(slots, nbytes, is_read, out_read, out_write, out_ops):
+    """Sum I/O bytes per tracked PID slot (compiled with numba when available)"""
+    
+    for i in range(slots.shape[0]):
+        slot = slots[i]
+        if slot < 0:
+            continue
+        if is_read[i]:
+            out_read[slot] += nbytes[i]
+        else:
+            out_write[slot] += nbytes[i]
+        out_ops[slot] += 1
+
+
+def _aggregate_io_numpy(slots, nbytes, is_read, out_read, out_write, out_ops):
+    """Vectorized fallback for aggregate_io when numba is not installed"""
+    
+    tracked = slots >= 0
+    slots = slots[tracked]
+    nbytes = nbytes[tracked]
+    is_read = is_read[tracked]
+    
+    np.add.at(out_read, slots[is_read], nbytes[is_read])
+    np.add.at(out_write, slots[~is_read], nbytes[~is_read])
+    np.add.at(out_ops, slots, 1)
+
+
+if NUMBA_AVAILABLE:
+    aggregate_io = njit(cache=True, nogil=True)(_aggregate_io_loop)
+else:
+    aggregate_io = _aggregate_io_numpy
+
+
+# Classification labels, indexed by the code returned by _classify_kernel
+CLASS_LABELS = ('Unknown', 'CPU-bound', 'CPU-IO-mixed', 'IO-bound-intensive', 'IO-bound',
+                'Idle-heavy-switching', 'Idle-heavy', 'Mixed-intensive', 'Balanced')
+
+# Metric columns, in order, of the array passed to JobClassifier.classify_jobs
+CLASSIFY_COLUMNS = ('cpu_percent', 'io_percent', 'wait_percent', 'context_switches', 'total_syscalls')
+
+
+def _classify_kernel(cpu_percent, io_percent, wait_percent, context_switches, total_syscalls,
+                     cpu_bound_threshold, io_bound_threshold, idle_threshold, context_switch_threshold):
+    """Index into CLASS_LABELS for one job's metrics"""
+    
+    # Handle edge cases
+    if total_syscalls == 0:
+        return 0
+    
+    switching = context_switches > context_switch_threshold
+    
+    # Primary classification based on CPU usage
+    if cpu_percent >= cpu_bound_threshold:
+        return 1 if io_percent < 10 else 2
+    elif io_percent >= io_bound_threshold:
+        return 3 if switching else 4
+    elif wait_percent >= idle_threshold:
+        return 5 if switching else 6
+    else:
+        # Mixed or balanced workload
+        return 7 if switching else 8
+
+
+def _efficiency_kernel(cpu_percent, io_percent, wait_percent, context_switches, total_syscalls):
+    """Efficiency score (0-100) for one job's metrics"""
+    
+    if total_syscalls == 0:
+        return 0.0
+    
+    # Base score from CPU utilization
+    cpu_score = min(cpu_percent, 100.0) * 0.4
+    
+    # I/O efficiency (moderate I/O is good, too much or too little is bad)
+    if io_percent < 5:
+        io_score = io_percent * 4  # Scale up low I/O
+    elif io_percent > 50:
+        io_score = max(0.0, 50 - (io_percent - 50))  # Penalize excessive I/O
+    else:
+        io_score = 20.0  # Optimal I/O range
+    
+    io_score *= 0.3
+    
+    # Wait time penalty
+    wait_penalty = min(wait_percent * 0.5, 30.0)
+    
+    # Context switching penalty
+    if context_switches > 1000:
+        cs_penalty = min((context_switches - 1000) / 1000 * 10, 20.0)
+    else:
+        cs_penalty = 0.0
+    
+    # Calculate final score
+    efficiency_score = cpu_score + io_score - wait_penalty - cs_penalty
+    
+    return max(0.0, min(100.0, efficiency_score))
+
+
+def _classify_batch_numpy(metrics, thresholds, labels, scores):
+    """Vectorized fallback for classify_batch when numba is not installed"""
+    
+    cpu, io, wait, switches, syscalls = metrics.T
+    cpu_bound, io_bound, idle, switch_threshold = thresholds
+    switching = switches > switch_threshold
+    
+    labels[:] = np.select(
+        [syscalls == 0, cpu >= cpu_bound, io >= io_bound, wait >= idle],
+        [0, np.where(io < 10, 1, 2), np.where(switching, 3, 4), np.where(switching, 5, 6)],
+        np.where(switching, 7, 8)
+    )
+    
+    io_score = np.where(io < 5, io * 4, np.where(io > 50, np.maximum(0.0, 50 - (io - 50)), 20.0))
+    cs_penalty = np.where(switches > 1000, np.minimum((switches - 1000) / 1000 * 10, 20.0), 0.0)
+    score = (np.minimum(cpu, 100.0) * 0.4 + io_score * 0.3
+             - np.minimum(wait * 0.5, 30.0) - cs_penalty)
+    scores[:] = np.where(syscalls == 0, 0.0, np.clip(score, 0.0, 100.0))
+
+
+if NUMBA_AVAILABLE:
+    _classify_compiled = njit(cache=True)(_classify_kernel)
+    _efficiency_compiled = njit(cache=True)(_efficiency_kernel)
+    
+    @njit(cache=True, parallel=True)
+    def classify_batch(metrics, thresholds, labels, scores):
+        """Label code and efficiency score for every row of a jobs x CLASSIFY_COLUMNS array"""
+        
+        for i in prange(metrics.shape[0]):
+            row = metrics[i]
+            labels[i] = _classify_compiled(row[0], row[1], row[2], row[3], row[4],
+                                           thresholds[0], thresholds[1], thresholds[2], thresholds[3])
+            scores[i] = _efficiency_compiled(row[0], row[1], row[2], row[3], row[4])
+else:
+    classify_batch = _classify_batch_numpy
+
+
+# Integer codes of the event types accepted by JobAnalyzer.aggregate_metrics
+EVENT_TYPES = {'syscall': 0, 'sched_switch': 1, 'io_event': 2, 'net_event': 3}
+
+# Keys of every metrics dict produced by JobAnalyzer
+METRIC_KEYS = (
+    'total_syscalls', 'io_syscalls', 'net_syscalls', 'context_switches',
+    'cpu_time_ns', 'wait_time_ns', 'cpu_percent', 'wait_percent', 'io_percent',
+    'net_percent', 'total_io_bytes', 'read_bytes', 'write_bytes', 'io_operations',
+    'total_net_bytes', 'send_bytes', 'recv_bytes', 'net_operations',
+    'avg_syscall_duration', 'monitored_pids',
+)
+
+
 class JobAnalyzer:
     """
     Analyzes monitoring data to extract meaningful metrics
@@ -64,52 +217,104 @@ class JobAnalyzer:
         
         return syscalls
     
-    def aggregate_pid_metrics(self, pids: Set[int], probe_data: Dict) -> Dict:
-        """Aggregate metrics for a set of PIDs"""
+    def io_totals_by_pid(self, io_arrays: Optional[Tuple[np.ndarray, ...]],
+                         pids: Set[int]) -> Dict[int, Tuple[int, int, int]]:
+        """
+        Sum read bytes, write bytes and operation counts per PID in a
+        single pass over the I/O event columns
+        """
+        
+        if not pids or io_arrays is None or len(io_arrays[0]) == 0:
+            return {}
+        
+        tracked = np.array(sorted(pids), dtype=np.int64)
+        pids_arr, bytes_arr, is_read_arr = io_arrays[:3]
+        
+        # Slot of each event's PID in tracked, or -1 for untracked PIDs
+        slots = np.searchsorted(tracked, pids_arr)
+        np.minimum(slots, len(tracked) - 1, out=slots)
+        slots[tracked[slots] != pids_arr] = -1
+        
+        out_read = np.zeros(len(tracked), dtype=np.uint64)
+        out_write = np.zeros(len(tracked), dtype=np.uint64)
+        out_ops = np.zeros(len(tracked), dtype=np.int64)
+        
+        aggregate_io(slots, bytes_arr, is_read_arr, out_read, out_write, out_ops)
+        
+        return {
+            pid: (read, write, ops)
+            for pid, read, write, ops in zip(tracked.tolist(), out_read.tolist(),
+                                             out_write.tolist(), out_ops.tolist())
+            if ops
+        }
+    
+    @staticmethod
+    def _syscall_ids(syscall_ids: Set[int], limit: int) -> List[int]:
+        """Syscall ids that index into a count vector of the given length"""
+        
+        return [syscall_id for syscall_id in syscall_ids if syscall_id < limit]
+    
+    def aggregate_pid_metrics(self, pids: Set[int], probe_data: Dict,
+                              io_totals: Optional[Dict[int, Tuple[int, int, int]]] = None) -> Dict:
+        """
+        Aggregate metrics for a set of PIDs
+        
+        Args:
+            pids: PIDs belonging to the job
+            probe_data: Snapshot returned by EBPFProbeManager.get_current_data
+            io_totals: Precomputed io_totals_by_pid result covering at least pids
+        """
         
         if not pids:
             return self._empty_metrics()
         
         # Extract data for the specified PIDs
-        syscall_counts = probe_data.get('syscall_counts', {})
-        sched_events = probe_data.get('sched_events', {})
-        io_events = probe_data.get('io_events', {})
-        net_events = probe_data.get('net_events', {})
-        detailed_syscalls = probe_data.get('detailed_syscalls', {})
+        syscall_counts = probe_data.get('syscall_counts')
+        sched_events = probe_data.get('sched_events')
+        syscall_events = probe_data.get('syscall_events')
+        net_events = probe_data.get('net_events')
+        pid_array = np.fromiter(pids, dtype=np.int64, count=len(pids))
         
         # Aggregate syscall data
         total_syscalls = 0
         io_syscalls = 0
         net_syscalls = 0
-        syscall_durations = []
         
-        for pid in pids:
-            if pid in syscall_counts:
-                for syscall_id, count in syscall_counts[pid].items():
-                    total_syscalls += count
-                    
-                    if syscall_id in self.io_syscalls:
-                        io_syscalls += count
-                    elif syscall_id in self.net_syscalls:
-                        net_syscalls += count
-            
-            # Collect syscall durations
-            if pid in detailed_syscalls:
-                for event in detailed_syscalls[pid]:
-                    syscall_durations.append(event['duration'])
+        if syscall_counts is not None:
+            counts = syscall_counts.counts_for(pids)
+            total_syscalls = int(counts.sum())
+            io_syscalls = int(counts[self._syscall_ids(self.io_syscalls, len(counts))].sum())
+            net_syscalls = int(counts[self._syscall_ids(self.net_syscalls - self.io_syscalls,
+                                                        len(counts))].sum())
+        
+        # Collect syscall durations
+        avg_syscall_duration = 0
+        if syscall_events is not None and len(syscall_events):
+            durations = syscall_events['duration'][np.isin(syscall_events['pid'], pid_array)]
+            if len(durations):
+                avg_syscall_duration = float(durations.mean())
         
         # Aggregate scheduling data
         context_switches = 0
         cpu_time_ns = 0
         wait_time_ns = 0
         
-        for pid in pids:
-            if pid in sched_events:
-                events = sched_events[pid]
-                context_switches += len(events)
+        if sched_events is not None and len(sched_events):
+            sched_ts = sched_events.columns['ts']
+            sched_prev = sched_events.columns['prev_pid']
+            sched_next = sched_events.columns['next_pid']
+            
+            for pid in pids:
+                rows = sched_events.rows_for(pid)
+                if not len(rows):
+                    continue
+                
+                context_switches += len(rows)
                 
                 # Calculate CPU vs wait time from scheduling events
-                cpu_periods, wait_periods = self._analyze_sched_events(events, pid)
+                cpu_periods, wait_periods = self._analyze_sched_events(
+                    sched_ts[rows], sched_prev[rows], sched_next[rows], pid
+                )
                 cpu_time_ns += sum(cpu_periods)
                 wait_time_ns += sum(wait_periods)
         
@@ -119,16 +324,17 @@ class JobAnalyzer:
         write_bytes = 0
         io_operations = 0
         
+        if io_totals is None:
+            io_totals = self.io_totals_by_pid(probe_data.get('io_arrays'), pids)
+        
         for pid in pids:
-            if pid in io_events:
-                for event in io_events[pid]:
-                    total_io_bytes += event['bytes']
-                    io_operations += 1
-                    
-                    if event['is_read']:
-                        read_bytes += event['bytes']
-                    else:
-                        write_bytes += event['bytes']
+            if pid in io_totals:
+                pid_read, pid_write, pid_ops = io_totals[pid]
+                read_bytes += pid_read
+                write_bytes += pid_write
+                io_operations += pid_ops
+        
+        total_io_bytes = read_bytes + write_bytes
         
         # Aggregate network data
         total_net_bytes = 0
@@ -136,37 +342,24 @@ class JobAnalyzer:
         recv_bytes = 0
         net_operations = 0
         
-        for pid in pids:
-            if pid in net_events:
-                for event in net_events[pid]:
-                    total_net_bytes += event['bytes']
-                    net_operations += 1
-                    
-                    if event['is_send']:
-                        send_bytes += event['bytes']
-                    else:
-                        recv_bytes += event['bytes']
+        if net_events is not None and len(net_events):
+            mask = np.isin(net_events['pid'], pid_array)
+            net_bytes = net_events['bytes'][mask]
+            is_send = net_events['is_send'][mask]
+            
+            net_operations = len(net_bytes)
+            send_bytes = int(net_bytes[is_send].sum())
+            recv_bytes = int(net_bytes[~is_send].sum())
+            total_net_bytes = send_bytes + recv_bytes
         
         # Calculate percentages
-        total_time_ns = cpu_time_ns + wait_time_ns
-        
-        if total_time_ns > 0:
-            cpu_percent = (cpu_time_ns / total_time_ns) * 100
-            wait_percent = (wait_time_ns / total_time_ns) * 100
-        else:
-            cpu_percent = 0
-            wait_percent = 0
-        
-        # Calculate I/O percentage (rough estimate)
-        if total_syscalls > 0:
-            io_percent = (io_syscalls / total_syscalls) * 100
-            net_percent = (net_syscalls / total_syscalls) * 100
-        else:
-            io_percent = 0
-            net_percent = 0
-        
-        # Calculate average syscall duration
-        avg_syscall_duration = statistics.mean(syscall_durations) if syscall_durations else 0
+        percentages = self._calculate_time_percentages({
+            'cpu_time_ns': cpu_time_ns,
+            'wait_time_ns': wait_time_ns,
+            'total_syscalls': total_syscalls,
+            'io_syscalls': io_syscalls,
+            'net_syscalls': net_syscalls
+        })
         
         return {
             'total_syscalls': total_syscalls,
@@ -175,10 +368,10 @@ class JobAnalyzer:
             'context_switches': context_switches,
             'cpu_time_ns': cpu_time_ns,
             'wait_time_ns': wait_time_ns,
-            'cpu_percent': cpu_percent,
-            'wait_percent': wait_percent,
-            'io_percent': io_percent,
-            'net_percent': net_percent,
+            'cpu_percent': percentages['cpu_percent'],
+            'wait_percent': percentages['wait_percent'],
+            'io_percent': percentages['io_percent'],
+            'net_percent': percentages['net_percent'],
             'total_io_bytes': total_io_bytes,
             'read_bytes': read_bytes,
             'write_bytes': write_bytes,
@@ -191,27 +384,172 @@ class JobAnalyzer:
             'monitored_pids': len(pids)
         }
     
-    def _analyze_sched_events(self, events: List[Dict], target_pid: int) -> Tuple[List[int], List[int]]:
+    def aggregate_metrics(self, events, pids, out: Optional[Dict] = None) -> Dict:
+        """
+        Aggregate metrics for a flat stream of events
+        
+        events is either a list of event dicts or the same events as a dict
+        of equal-length NumPy columns: 'type' (EVENT_TYPES codes), 'pid',
+        'bytes', 'duration', 'timestamp' and optionally 'next_pid',
+        'syscall_id', 'is_read' and 'is_send'. pids is any sized collection of PIDs,
+        preferably a frozenset; an empty pids selects every event. If out is
+        given it is cleared, filled in place and returned.
+        """
+        
+        columns = events if isinstance(events, dict) else self._events_to_columns(events)
+        metrics = self._empty_metrics(out)
+        
+        types = columns['type']
+        event_pids = columns['pid']
+        count = len(types)
+        if count == 0:
+            return metrics
+        
+        next_pids = columns.get('next_pid', np.full(count, -1, dtype=np.int64))
+        nbytes = columns['bytes']
+        
+        if pids:
+            pid_array = np.fromiter(pids, dtype=np.int64, count=len(pids))
+            selected = np.isin(event_pids, pid_array)
+            switched_in = np.isin(next_pids, pid_array)
+        else:
+            pid_array = None
+            selected = np.ones(count, dtype=bool)
+            switched_in = selected
+        
+        # Syscalls
+        syscalls = selected & (types == EVENT_TYPES['syscall'])
+        syscall_ids = columns.get('syscall_id', np.full(count, -1, dtype=np.int64))[syscalls]
+        metrics['total_syscalls'] = int(np.count_nonzero(syscalls))
+        metrics['io_syscalls'] = int(np.isin(syscall_ids, list(self.io_syscalls)).sum())
+        metrics['net_syscalls'] = int(np.isin(syscall_ids, list(self.net_syscalls - self.io_syscalls)).sum())
+        if metrics['total_syscalls']:
+            metrics['avg_syscall_duration'] = float(columns['duration'][syscalls].mean())
+        
+        # Scheduling
+        sched = (selected | switched_in) & (types == EVENT_TYPES['sched_switch'])
+        metrics['context_switches'] = int(np.count_nonzero(sched))
+        
+        if metrics['context_switches']:
+            order = np.argsort(columns['timestamp'][sched], kind='stable')
+            sched_ts = columns['timestamp'][sched][order]
+            sched_prev = event_pids[sched][order]
+            sched_next = next_pids[sched][order]
+            
+            # Group switch rows by each PID they involve, in time order
+            rows = np.arange(len(order))
+            distinct = sched_next != sched_prev
+            owners = np.concatenate((sched_prev, sched_next[distinct]))
+            owner_rows = np.concatenate((rows, rows[distinct]))
+            by_owner = np.lexsort((owner_rows, owners))
+            owners = owners[by_owner]
+            owner_rows = owner_rows[by_owner]
+            
+            # Only PIDs that were switched out can accumulate CPU periods
+            targets = np.unique(sched_prev)
+            if pid_array is not None:
+                targets = np.intersect1d(targets, pid_array)
+            starts = np.searchsorted(owners, targets, side='left')
+            ends = np.searchsorted(owners, targets, side='right')
+            
+            for pid, start, end in zip(targets.tolist(), starts.tolist(), ends.tolist()):
+                pid_rows = owner_rows[start:end]
+                cpu_periods, wait_periods = self._analyze_sched_events(
+                    sched_ts[pid_rows], sched_prev[pid_rows], sched_next[pid_rows], pid
+                )
+                metrics['cpu_time_ns'] += sum(cpu_periods)
+                metrics['wait_time_ns'] += sum(wait_periods)
+        
+        # I/O
+        io = selected & (types == EVENT_TYPES['io_event'])
+        is_read = columns.get('is_read', np.zeros(count, dtype=bool))
+        metrics['read_bytes'] = int(nbytes[io & is_read].sum())
+        metrics['write_bytes'] = int(nbytes[io & ~is_read].sum())
+        metrics['total_io_bytes'] = metrics['read_bytes'] + metrics['write_bytes']
+        metrics['io_operations'] = int(np.count_nonzero(io))
+        
+        # Network
+        net = selected & (types == EVENT_TYPES['net_event'])
+        is_send = columns.get('is_send', np.zeros(count, dtype=bool))
+        metrics['send_bytes'] = int(nbytes[net & is_send].sum())
+        metrics['recv_bytes'] = int(nbytes[net & ~is_send].sum())
+        metrics['total_net_bytes'] = metrics['send_bytes'] + metrics['recv_bytes']
+        metrics['net_operations'] = int(np.count_nonzero(net))
+        
+        metrics['monitored_pids'] = len(pids) if pids else len(np.unique(event_pids))
+        self._calculate_time_percentages(metrics, out=metrics)
+        
+        return metrics
+    
+    def _events_to_columns(self, events: List[Dict]) -> Dict[str, np.ndarray]:
+        """Convert a list of event dicts into the columns used by aggregate_metrics"""
+        
+        syscall_ids = {name: syscall_id for syscall_id, name in self.syscall_names.items()}
+        
+        return {
+            'type': np.array([EVENT_TYPES.get(event.get('type'), -1) for event in events], dtype=np.int8),
+            'pid': np.array([event.get('pid', -1) for event in events], dtype=np.int64),
+            'next_pid': np.array([event.get('next_pid', -1) for event in events], dtype=np.int64),
+            'bytes': np.array([event.get('bytes', 0) for event in events], dtype=np.int64),
+            'duration': np.array([event.get('duration', 0) for event in events], dtype=np.int64),
+            'timestamp': np.array([event.get('timestamp', 0) for event in events], dtype=np.int64),
+            'syscall_id': np.array([syscall_ids.get(event.get('name'), -1) for event in events], dtype=np.int64),
+            'is_read': np.array([event.get('operation') == 'read' for event in events], dtype=bool),
+            'is_send': np.array([bool(event.get('is_send')) for event in events], dtype=bool),
+        }
+    
+    def _calculate_time_percentages(self, metrics: Dict, out: Optional[Dict] = None) -> Dict[str, float]:
+        """
+        CPU/wait shares of scheduled time and I/O/network shares of syscalls
+        
+        The four percentages are written into out (e.g. metrics itself) when
+        given, otherwise into a new dict.
+        """
+        
+        total_time_ns = metrics['cpu_time_ns'] + metrics['wait_time_ns']
+        total_syscalls = metrics['total_syscalls']
+        
+        percentages = {} if out is None else out
+        
+        if total_time_ns > 0:
+            percentages['cpu_percent'] = (metrics['cpu_time_ns'] / total_time_ns) * 100
+            percentages['wait_percent'] = (metrics['wait_time_ns'] / total_time_ns) * 100
+        else:
+            percentages['cpu_percent'] = percentages['wait_percent'] = 0
+        
+        # Calculate I/O percentage (rough estimate)
+        if total_syscalls > 0:
+            percentages['io_percent'] = (metrics['io_syscalls'] / total_syscalls) * 100
+            percentages['net_percent'] = (metrics['net_syscalls'] / total_syscalls) * 100
+        else:
+            percentages['io_percent'] = percentages['net_percent'] = 0
+        
+        return percentages
+    
+    def _analyze_sched_events(self, timestamps: np.ndarray, prev_pids: np.ndarray,
+                              next_pids: np.ndarray, target_pid: int) -> Tuple[List[int], List[int]]:
         """Analyze scheduling events to determine CPU vs wait time"""
         
         cpu_periods = []
         wait_periods = []
         
-        if len(events) < 2:
+        if len(timestamps) < 2:
             return cpu_periods, wait_periods
         
         # Sort events by timestamp
-        sorted_events = sorted(events, key=lambda x: x['timestamp'])
+        order = np.argsort(timestamps, kind='stable')
+        sorted_events = zip(timestamps[order].tolist(), prev_pids[order].tolist(),
+                            next_pids[order].tolist())
         
         last_scheduled_in = None
         
-        for event in sorted_events:
-            if event['next_pid'] == target_pid:
+        for timestamp, prev_pid, next_pid in sorted_events:
+            if next_pid == target_pid:
                 # Process was scheduled in
-                last_scheduled_in = event['timestamp']
-            elif event['prev_pid'] == target_pid and last_scheduled_in:
+                last_scheduled_in = timestamp
+            elif prev_pid == target_pid and last_scheduled_in:
                 # Process was scheduled out
-                cpu_time = event['timestamp'] - last_scheduled_in
+                cpu_time = timestamp - last_scheduled_in
                 cpu_periods.append(cpu_time)
                 last_scheduled_in = None
         
@@ -258,45 +596,32 @@ class JobAnalyzer:
         
         return updated
     
-    def _empty_metrics(self) -> Dict:
-        """Return empty metrics structure"""
+    def _empty_metrics(self, out: Optional[Dict] = None) -> Dict:
+        """Return empty metrics structure, resetting out in place if given"""
         
-        return {
-            'total_syscalls': 0,
-            'io_syscalls': 0,
-            'net_syscalls': 0,
-            'context_switches': 0,
-            'cpu_time_ns': 0,
-            'wait_time_ns': 0,
-            'cpu_percent': 0,
-            'wait_percent': 0,
-            'io_percent': 0,
-            'net_percent': 0,
-            'total_io_bytes': 0,
-            'read_bytes': 0,
-            'write_bytes': 0,
-            'io_operations': 0,
-            'total_net_bytes': 0,
-            'send_bytes': 0,
-            'recv_bytes': 0,
-            'net_operations': 0,
-            'avg_syscall_duration': 0,
-            'monitored_pids': 0
-        }
+        if out is None:
+            return dict.fromkeys(METRIC_KEYS, 0)
+        
+        out.clear()
+        for key in METRIC_KEYS:
+            out[key] = 0
+        return out
     
     def get_syscall_breakdown(self, probe_data: Dict, pids: Set[int]) -> Dict[str, int]:
         """Get breakdown of syscalls by name"""
         
-        syscall_counts = probe_data.get('syscall_counts', {})
-        breakdown = defaultdict(int)
+        syscall_counts = probe_data.get('syscall_counts')
+        breakdown = {}
         
-        for pid in pids:
-            if pid in syscall_counts:
-                for syscall_id, count in syscall_counts[pid].items():
-                    syscall_name = self.syscall_names.get(syscall_id, f'syscall_{syscall_id}')
-                    breakdown[syscall_name] += count
+        if syscall_counts is None:
+            return breakdown
+        
+        counts = syscall_counts.counts_for(pids)
+        for syscall_id in np.flatnonzero(counts).tolist():
+            syscall_name = self.syscall_names.get(syscall_id, f'syscall_{syscall_id}')
+            breakdown[syscall_name] = int(counts[syscall_id])
         
-        return dict(breakdown)
+        return breakdown
 
 
 class JobClassifier:
@@ -316,44 +641,29 @@ class JobClassifier:
     def classify_job(self, metrics: Dict) -> str:
         """Classify a job based on its metrics"""
         
-        cpu_percent = metrics.get('cpu_percent', 0)
-        io_percent = metrics.get('io_percent', 0)
-        wait_percent = metrics.get('wait_percent', 0)
-        context_switches = metrics.get('context_switches', 0)
-        total_syscalls = metrics.get('total_syscalls', 0)
-        
-        # Handle edge cases
-        if total_syscalls == 0:
-            return 'Unknown'
-        
-        # Primary classification based on CPU usage
-        if cpu_percent >= self.cpu_bound_threshold:
-            # High CPU usage
-            if io_percent < 10:
-                return 'CPU-bound'
-            else:
-                return 'CPU-IO-mixed'
-        
-        elif io_percent >= self.io_bound_threshold:
-            # High I/O activity
-            if context_switches > self.context_switch_threshold:
-                return 'IO-bound-intensive'
-            else:
-                return 'IO-bound'
-        
-        elif wait_percent >= self.idle_threshold:
-            # High wait time
-            if context_switches > self.context_switch_threshold:
-                return 'Idle-heavy-switching'
-            else:
-                return 'Idle-heavy'
+        return CLASS_LABELS[_classify_kernel(
+            *(metrics.get(column, 0) for column in CLASSIFY_COLUMNS),
+            self.cpu_bound_threshold, self.io_bound_threshold,
+            self.idle_threshold, self.context_switch_threshold
+        )]
+    
+    def classify_jobs(self, metrics: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify many jobs at once
         
-        else:
-            # Mixed or balanced workload
-            if context_switches > self.context_switch_threshold:
-                return 'Mixed-intensive'
-            else:
-                return 'Balanced'
+        metrics has one row per job and one column per CLASSIFY_COLUMNS
+        entry. Returns the classification labels and efficiency scores.
+        """
+        
+        metrics = np.ascontiguousarray(metrics, dtype=np.float64).reshape(-1, len(CLASSIFY_COLUMNS))
+        thresholds = np.array([self.cpu_bound_threshold, self.io_bound_threshold,
+                               self.idle_threshold, self.context_switch_threshold], dtype=np.float64)
+        labels = np.empty(len(metrics), dtype=np.int8)
+        scores = np.empty(len(metrics), dtype=np.float64)
+        
+        classify_batch(metrics, thresholds, labels, scores)
+        
+        return np.array(CLASS_LABELS)[labels], scores
     
     def get_recommendations(self, metrics: Dict, classification: str) -> List[str]:
         """Get optimization recommendations based on classification"""
@@ -417,41 +727,7 @@ class JobClassifier:
     def get_efficiency_score(self, metrics: Dict) -> float:
         """Calculate an efficiency score (0-100) for the job"""
         
-        cpu_percent = metrics.get('cpu_percent', 0)
-        io_percent = metrics.get('io_percent', 0)
-        wait_percent = metrics.get('wait_percent', 0)
-        context_switches = metrics.get('context_switches', 0)
-        total_syscalls = metrics.get('total_syscalls', 0)
-        
-        if total_syscalls == 0:
-            return 0.0
-        
-        # Base score from CPU utilization
-        cpu_score = min(cpu_percent, 100) * 0.4
-        
-        # I/O efficiency (moderate I/O is good, too much or too little is bad)
-        if io_percent < 5:
-            io_score = io_percent * 4  # Scale up low I/O
-        elif io_percent > 50:
-            io_score = max(0, 50 - (io_percent - 50))  # Penalize excessive I/O
-        else:
-            io_score = 20  # Optimal I/O range
-        
-        io_score *= 0.3
-        
-        # Wait time penalty
-        wait_penalty = min(wait_percent * 0.5, 30)
-        
-        # Context switching penalty
-        if context_switches > 1000:
-            cs_penalty = min((context_switches - 1000) / 1000 * 10, 20)
-        else:
-            cs_penalty = 0
-        
-        # Calculate final score
-        efficiency_score = cpu_score + io_score - wait_penalty - cs_penalty
-        
-        return max(0, min(100, efficiency_score))
+        return _efficiency_kernel(*(metrics.get(column, 0) for column in CLASSIFY_COLUMNS))
     
     def compare_jobs(self, job_metrics: List[Dict]) -> Dict:
         """Compare multiple jobs and provide insights"""
@@ -459,16 +735,14 @@ class JobClassifier:
         if not job_metrics:
             return {}
         
-        classifications = []
-        efficiency_scores = []
-        cpu_percentages = []
-        io_percentages = []
+        table = np.array([[metrics.get(column, 0) for column in CLASSIFY_COLUMNS]
+                          for metrics in job_metrics], dtype=np.float64)
+        labels, scores = self.classify_jobs(table)
         
-        for metrics in job_metrics:
-            classifications.append(self.classify_job(metrics))
-            efficiency_scores.append(self.get_efficiency_score(metrics))
-            cpu_percentages.append(metrics.get('cpu_percent', 0))
-            io_percentages.append(metrics.get('io_percent', 0))
+        classifications = labels.tolist()
+        efficiency_scores = scores.tolist()
+        cpu_percentages = [metrics.get('cpu_percent', 0) for metrics in job_metrics]
+        io_percentages = [metrics.get('io_percent', 0) for metrics in job_metrics]
         
         # Calculate statistics
         avg_efficiency = statistics.mean(efficiency_scores)
@@ -9,49 +9,90 @@ Author: Pau Santana
 License: MIT
 """
 
+import functools
 import logging
+import os
+import threading
 import time
-from collections import defaultdict
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from bcc import BPF
+import numpy as np
 import psutil
 
 logger = logging.getLogger(__name__)
 
-class EBPFProbeManager:
-    """
-    Manages eBPF probes for monitoring various kernel events
-    """
-    
-    def __init__(self, config: Dict):
-        self.config = config
-        self.bpf = None
-        self.probes_loaded = False
-        self.start_time = time.time()
-        
-        # Data storage
-        self.syscall_counts = defaultdict(lambda: defaultdict(int))
-        self.sched_events = defaultdict(list)
-        self.io_events = defaultdict(list)
-        self.net_events = defaultdict(list)
-        
-        # Filter configuration
-        self.filter_type = config.get('filter', 'all')
-        self.monitored_pids = set()
-    
-    def get_ebpf_program(self) -> str:
-        """
-        Generate the eBPF C program based on configuration
-        """
-        
-        program = """
+# Column type for byte strings stored as ids into a per-column table of
+# distinct values (HPC ranks share a handful of command names)
+INTERNED = 'interned'
+
+# Syscall numbers are below this on every supported architecture
+MAX_SYSCALLS = 512
+
+# Longest pause (seconds) between retries while perf buffer polling fails
+POLL_MAX_BACKOFF = 5.0
+
+# Column layout for syscall events (see struct syscall_data_t)
+SYSCALL_EVENT_FIELDS = {
+    'pid': np.uint32,
+    'ts': np.uint64,
+    'syscall_id': np.uint64,
+    'duration': np.uint64,
+    'comm': INTERNED,
+}
+
+# Column layout for I/O events (see struct io_data_small_t)
+IO_EVENT_FIELDS = {
+    'pid': np.uint32,
+    'ts': np.uint64,
+    'bytes': np.uint64,
+    'is_read': np.bool_,
+    'comm': INTERNED,
+}
+
+# Column layout for I/O events with filenames (see struct io_data_t)
+IO_FULL_EVENT_FIELDS = dict(IO_EVENT_FIELDS, filename='S256')
+
+# Column layout for scheduler switch events (see struct sched_data_t)
+SCHED_EVENT_FIELDS = {
+    'ts': np.uint64,
+    'prev_pid': np.uint32,
+    'next_pid': np.uint32,
+    'prev_state': np.uint32,
+    'prev_comm': INTERNED,
+    'next_comm': INTERNED,
+}
+
+# Column layout for network events (see struct net_data_t)
+NET_EVENT_FIELDS = {
+    'pid': np.uint32,
+    'ts': np.uint64,
+    'bytes': np.uint64,
+    'is_send': np.bool_,
+    'protocol': np.uint32,
+    'comm': INTERNED,
+}
+
+_NO_ROWS = np.zeros(0, dtype=np.int64)
+
+PROBE_TYPES = ('syscall', 'sched', 'io', 'net')
+
+# eBPF C program fragments; only the enabled probes are compiled
+COMMON_PROGRAM = """
 #include <uapi/linux/ptrace.h>
 #include <linux/sched.h>
 #include <linux/fs.h>
 #include <linux/socket.h>
 
-// Data structures for events
+// Helper function to check if PID should be monitored
+static inline int should_monitor_pid(u32 pid) {
+    // For now, monitor all processes
+    // TODO: Add PID filtering based on Slurm jobs
+    return 1;
+}
+"""
+
+SYSCALL_PROGRAM = """
 struct syscall_data_t {
     u32 pid;
     u32 tid;
@@ -62,49 +103,8 @@ struct syscall_data_t {
     u64 duration;
 };
 
-struct sched_data_t {
-    u32 prev_pid;
-    u32 next_pid;
-    u64 ts;
-    char prev_comm[TASK_COMM_LEN];
-    char next_comm[TASK_COMM_LEN];
-    u32 prev_state;
-};
-
-struct io_data_t {
-    u32 pid;
-    u32 tid;
-    u64 ts;
-    char comm[TASK_COMM_LEN];
-    u64 bytes;
-    u64 offset;
-    char filename[256];
-    u32 is_read;
-};
-
-struct net_data_t {
-    u32 pid;
-    u32 tid;
-    u64 ts;
-    char comm[TASK_COMM_LEN];
-    u64 bytes;
-    u32 is_send;
-    u32 protocol;
-};
-
-// Maps for storing data
 BPF_HASH(syscall_enter_time, u64, u64);
 BPF_PERF_OUTPUT(syscall_events);
-BPF_PERF_OUTPUT(sched_events);
-BPF_PERF_OUTPUT(io_events);
-BPF_PERF_OUTPUT(net_events);
-
-// Helper function to check if PID should be monitored
-static inline int should_monitor_pid(u32 pid) {
-    // For now, monitor all processes
-    // TODO: Add PID filtering based on Slurm jobs
-    return 1;
-}
 
 // Syscall entry probe
 int syscall_enter(struct pt_regs *ctx) {
@@ -151,6 +151,19 @@ int syscall_exit(struct pt_regs *ctx) {
     
     return 0;
 }
+"""
+
+SCHED_PROGRAM = """
+struct sched_data_t {
+    u32 prev_pid;
+    u32 next_pid;
+    u64 ts;
+    char prev_comm[TASK_COMM_LEN];
+    char next_comm[TASK_COMM_LEN];
+    u32 prev_state;
+};
+
+BPF_PERF_OUTPUT(sched_events);
 
 // Scheduler switch probe
 int trace_sched_switch(struct pt_regs *ctx, struct task_struct *prev, struct task_struct *next) {
@@ -173,6 +186,21 @@ int trace_sched_switch(struct pt_regs *ctx, struct task_struct *prev, struct tas
     
     return 0;
 }
+"""
+
+IO_PROGRAM = """
+struct io_data_t {
+    u32 pid;
+    u32 tid;
+    u64 ts;
+    char comm[TASK_COMM_LEN];
+    u64 bytes;
+    u64 offset;
+    char filename[256];
+    u32 is_read;
+};
+
+BPF_PERF_OUTPUT(io_events);
 
 // File read probe
 int trace_read_entry(struct pt_regs *ctx, struct file *file, char __user *buf, size_t count) {
@@ -229,6 +257,70 @@ int trace_write_entry(struct pt_regs *ctx, struct file *file, const char __user
     
     return 0;
 }
+"""
+
+IO_SMALL_PROGRAM = """
+struct io_data_small_t {
+    u32 pid;
+    u32 is_read;
+    u64 ts;
+    u64 bytes;
+    char comm[TASK_COMM_LEN];
+};
+
+BPF_PERF_OUTPUT(io_small_events);
+
+// File read probe (byte counts only)
+int trace_read_entry(struct pt_regs *ctx, struct file *file, char __user *buf, size_t count) {
+    u32 pid = bpf_get_current_pid_tgid() >> 32;
+    
+    if (!should_monitor_pid(pid))
+        return 0;
+    
+    struct io_data_small_t data = {};
+    data.pid = pid;
+    data.ts = bpf_ktime_get_ns();
+    data.bytes = count;
+    data.is_read = 1;
+    bpf_get_current_comm(&data.comm, sizeof(data.comm));
+    
+    io_small_events.perf_submit(ctx, &data, sizeof(data));
+    
+    return 0;
+}
+
+// File write probe (byte counts only)
+int trace_write_entry(struct pt_regs *ctx, struct file *file, const char __user *buf, size_t count) {
+    u32 pid = bpf_get_current_pid_tgid() >> 32;
+    
+    if (!should_monitor_pid(pid))
+        return 0;
+    
+    struct io_data_small_t data = {};
+    data.pid = pid;
+    data.ts = bpf_ktime_get_ns();
+    data.bytes = count;
+    data.is_read = 0;
+    bpf_get_current_comm(&data.comm, sizeof(data.comm));
+    
+    io_small_events.perf_submit(ctx, &data, sizeof(data));
+    
+    return 0;
+}
+"""
+
+NET_PROGRAM = """
+struct net_data_t {
+    u32 pid;
+    u32 tid;
+    u64 ts;
+    char comm[TASK_COMM_LEN];
+    u64 bytes;
+    u32 is_send;
+    u32 protocol;
+};
+
+BPF_PERF_OUTPUT(net_events);
 
 // Network send probe
 int trace_send_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *msg, size_t size) {
@@ -282,8 +374,245 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
     return 0;
 }
 """
+
+_PROBE_PROGRAMS = {
+    'syscall': SYSCALL_PROGRAM,
+    'sched': SCHED_PROGRAM,
+    'io': IO_SMALL_PROGRAM,
+    'net': NET_PROGRAM,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def build_ebpf_program(enabled_probes: frozenset, capture_filenames: bool = False) -> str:
+    """Assemble the eBPF C program from the fragments of the enabled probes"""
+    
+    programs = dict(_PROBE_PROGRAMS, io=IO_PROGRAM) if capture_filenames else _PROBE_PROGRAMS
+    
+    parts = [COMMON_PROGRAM]
+    parts.extend(programs[probe] for probe in PROBE_TYPES if probe in enabled_probes)
+    return ''.join(parts)
+
+
+class EventColumns:
+    """
+    Growable structure-of-arrays store for fixed-layout probe events
+    """
+    
+    def __init__(self, fields: Dict, capacity: int = 4096):
+        self.size = 0
+        self.capacity = capacity
+        self.columns = {}
+        self.tables = {}
+        self._interners = []
+        
+        for name, dtype in fields.items():
+            if dtype == INTERNED:
+                self.columns[name] = np.zeros(capacity, dtype=np.uint32)
+                self.tables[name] = []
+                self._interners.append((self.tables[name], {}))
+            else:
+                self.columns[name] = np.zeros(capacity, dtype=dtype)
+                self._interners.append(None)
+    
+    def append(self, *values):
+        """Append one event, values given in field order"""
+        
+        index = self.size
+        if index == self.capacity:
+            self._grow()
+        
+        for column, interner, value in zip(self.columns.values(), self._interners, values):
+            if interner is not None:
+                table, ids = interner
+                value_id = ids.get(value)
+                if value_id is None:
+                    value_id = ids[value] = len(table)
+                    table.append(value)
+                value = value_id
+            column[index] = value
+        
+        self.size = index + 1
+    
+    def _grow(self):
+        """Double the capacity of every column"""
+        
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(self.capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+    
+    def view(self, *names: str) -> Tuple[np.ndarray, ...]:
+        """Return views of the filled part of the requested columns"""
+        
+        size = self.size
+        return tuple(self.columns[name][:size] for name in names)
+    
+    def snapshot(self) -> 'EventView':
+        """Return a view of every column without copying event data"""
+        
+        return EventView(dict(zip(self.columns, self.view(*self.columns))), self.tables)
+
+
+class EventView:
+    """
+    Read-only snapshot of an EventColumns store; byte-string columns are
+    decoded on first access only
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], tables: Optional[Dict[str, List[bytes]]] = None):
+        self.columns = columns
+        self.tables = tables or {}
+        self._decoded = {}
+    
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+    
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+    
+    def decoded(self, name: str) -> np.ndarray:
+        """Return a byte-string column decoded to str"""
         
-        return program
+        if name not in self._decoded:
+            column = self.columns[name]
+            if name in self.tables:
+                # Decode each distinct value once, then expand by id
+                table = np.array(self.tables[name][:], dtype='S16')
+                self._decoded[name] = np.char.decode(table, 'utf-8', errors='replace')[column]
+            else:
+                self._decoded[name] = np.char.decode(column, 'utf-8', errors='replace')
+        
+        return self._decoded[name]
+    
+    @property
+    def comm_str(self) -> np.ndarray:
+        """Command names as str"""
+        
+        return self.decoded('comm')
+
+
+def _group_rows(pids: np.ndarray) -> Dict[int, np.ndarray]:
+    """Map each PID in a column to the (ascending) rows where it appears"""
+    
+    order = np.argsort(pids, kind='stable')
+    unique_pids, starts = np.unique(pids[order], return_index=True)
+    return dict(zip(unique_pids.tolist(), np.split(order, starts[1:])))
+
+
+class SchedEventIndex(EventView):
+    """
+    Scheduler switch events stored once, with per-PID row lookups for
+    both the switched-out (prev_pid) and switched-in (next_pid) roles
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], tables: Optional[Dict[str, List[bytes]]] = None):
+        super().__init__(columns, tables)
+        self._prev_of = None
+        self._next_of = None
+    
+    def rows_for(self, pid: int) -> np.ndarray:
+        """Row indices of the events in which pid was switched out or in"""
+        
+        if self._prev_of is None:
+            self._prev_of = _group_rows(self.columns['prev_pid'])
+            self._next_of = _group_rows(self.columns['next_pid'])
+        
+        return np.union1d(self._prev_of.get(pid, _NO_ROWS), self._next_of.get(pid, _NO_ROWS))
+
+
+class SyscallCountMatrix:
+    """
+    Per-PID syscall counts as a dense (PID row x syscall id) matrix
+    """
+    
+    def __init__(self, capacity: int = 256):
+        self.pid_row = {}
+        self.matrix = np.zeros((capacity, MAX_SYSCALLS), dtype=np.int64)
+    
+    def _alloc_row(self, pid: int) -> int:
+        """Assign the next free matrix row to pid"""
+        
+        row = len(self.pid_row)
+        if row == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+        
+        self.pid_row[pid] = row
+        return row
+    
+    def add(self, pids: np.ndarray, syscall_ids: np.ndarray):
+        """Count one call per (pid, syscall id) pair"""
+        
+        known = syscall_ids < MAX_SYSCALLS
+        pids = pids[known]
+        syscall_ids = syscall_ids[known].astype(np.int64)
+        
+        pid_row = self.pid_row
+        rows = np.fromiter(
+            (pid_row[pid] if pid in pid_row else self._alloc_row(pid) for pid in pids.tolist()),
+            dtype=np.int64, count=len(pids)
+        )
+        np.add.at(self.matrix, (rows, syscall_ids), 1)
+    
+    def rows_for(self, pids) -> np.ndarray:
+        """Matrix rows of the given PIDs (PIDs never seen are skipped)"""
+        
+        pid_row = self.pid_row
+        return np.array([pid_row[pid] for pid in pids if pid in pid_row], dtype=np.int64)
+    
+    def counts_for(self, pids) -> np.ndarray:
+        """Per-syscall-id totals over the given PIDs"""
+        
+        return self.matrix[self.rows_for(pids)].sum(axis=0)
+    
+    def total(self) -> int:
+        """Total number of syscalls counted"""
+        
+        return int(self.matrix.sum())
+
+
+class EBPFProbeManager:
+    """
+    Manages eBPF probes for monitoring various kernel events
+    """
+    
+    def __init__(self, config: Dict):
+        self.config = config
+        self.bpf = None
+        self.probes_loaded = False
+        self.start_time = time.time()
+        
+        # Data storage
+        self.syscall_counts = SyscallCountMatrix()
+        self._syscalls_counted = 0
+        self.syscall_columns = EventColumns(SYSCALL_EVENT_FIELDS)
+        self.sched_columns = EventColumns(SCHED_EVENT_FIELDS)
+        self.capture_filenames = config.get('capture_filenames', False)
+        self.io_columns = EventColumns(
+            IO_FULL_EVENT_FIELDS if self.capture_filenames else IO_EVENT_FIELDS
+        )
+        self.net_columns = EventColumns(NET_EVENT_FIELDS)
+        
+        # Filter configuration
+        self.filter_type = config.get('filter', 'all')
+        if self.filter_type == 'all':
+            self.enabled_probes = frozenset(PROBE_TYPES)
+        else:
+            self.enabled_probes = frozenset({self.filter_type}) & frozenset(PROBE_TYPES)
+        self.monitored_pids = set()
+        
+        # Background perf buffer draining
+        self._poll_thread = None
+        self._poll_stop = threading.Event()
+        self.poll_errors = 0
+    
+    def get_ebpf_program(self) -> str:
+        """
+        Generate the eBPF C program based on configuration
+        """
+        
+        return build_ebpf_program(self.enabled_probes, self.capture_filenames)
     
     def load_probes(self):
         """
@@ -295,16 +624,16 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
             self.bpf = BPF(text=self.get_ebpf_program())
             
             # Attach probes based on filter
-            if self.filter_type in ['all', 'syscall']:
+            if 'syscall' in self.enabled_probes:
                 self._attach_syscall_probes()
             
-            if self.filter_type in ['all', 'sched']:
+            if 'sched' in self.enabled_probes:
                 self._attach_sched_probes()
             
-            if self.filter_type in ['all', 'io']:
+            if 'io' in self.enabled_probes:
                 self._attach_io_probes()
             
-            if self.filter_type in ['all', 'net']:
+            if 'net' in self.enabled_probes:
                 self._attach_net_probes()
             
             # Setup event handlers
@@ -359,19 +688,22 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
         """Setup event handlers for perf buffers"""
         
         # Syscall events
-        if self.filter_type in ['all', 'syscall']:
+        if 'syscall' in self.enabled_probes:
             self.bpf["syscall_events"].open_perf_buffer(self._handle_syscall_event)
         
         # Scheduler events
-        if self.filter_type in ['all', 'sched']:
+        if 'sched' in self.enabled_probes:
             self.bpf["sched_events"].open_perf_buffer(self._handle_sched_event)
         
         # I/O events
-        if self.filter_type in ['all', 'io']:
-            self.bpf["io_events"].open_perf_buffer(self._handle_io_event)
+        if 'io' in self.enabled_probes:
+            if self.capture_filenames:
+                self.bpf["io_events"].open_perf_buffer(self._handle_io_event)
+            else:
+                self.bpf["io_small_events"].open_perf_buffer(self._handle_io_small_event)
         
         # Network events
-        if self.filter_type in ['all', 'net']:
+        if 'net' in self.enabled_probes:
             self.bpf["net_events"].open_perf_buffer(self._handle_net_event)
     
     def _handle_syscall_event(self, cpu, data, size):
@@ -379,71 +711,39 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
         
         event = self.bpf["syscall_events"].event(data)
         
-        pid = event.pid
-        syscall_id = event.syscall_id
-        duration = event.duration
-        
-        self.syscall_counts[pid][syscall_id] += 1
-        
-        # Store detailed event data
-        if not hasattr(self, 'detailed_syscalls'):
-            self.detailed_syscalls = defaultdict(list)
-        
-        self.detailed_syscalls[pid].append({
-            'timestamp': event.ts,
-            'syscall_id': syscall_id,
-            'duration': duration,
-            'comm': event.comm.decode('utf-8', 'replace')
-        })
+        # Counts are folded into syscall_counts in batches
+        self.syscall_columns.append(event.pid, event.ts, event.syscall_id, event.duration, event.comm)
     
     def _handle_sched_event(self, cpu, data, size):
         """Handle scheduler events"""
         
         event = self.bpf["sched_events"].event(data)
         
-        sched_data = {
-            'timestamp': event.ts,
-            'prev_pid': event.prev_pid,
-            'next_pid': event.next_pid,
-            'prev_comm': event.prev_comm.decode('utf-8', 'replace'),
-            'next_comm': event.next_comm.decode('utf-8', 'replace'),
-            'prev_state': event.prev_state
-        }
+        self.sched_columns.append(event.ts, event.prev_pid, event.next_pid, event.prev_state,
+                                  event.prev_comm, event.next_comm)
+    
+    def _handle_io_small_event(self, cpu, data, size):
+        """Handle I/O events without filenames"""
+        
+        event = self.bpf["io_small_events"].event(data)
         
-        self.sched_events[event.prev_pid].append(sched_data)
-        self.sched_events[event.next_pid].append(sched_data)
+        self.io_columns.append(event.pid, event.ts, event.bytes, event.is_read, event.comm)
     
     def _handle_io_event(self, cpu, data, size):
-        """Handle I/O events"""
+        """Handle I/O events with filenames"""
         
         event = self.bpf["io_events"].event(data)
         
-        io_data = {
-            'timestamp': event.ts,
-            'pid': event.pid,
-            'bytes': event.bytes,
-            'is_read': bool(event.is_read),
-            'filename': event.filename.decode('utf-8', 'replace'),
-            'comm': event.comm.decode('utf-8', 'replace')
-        }
-        
-        self.io_events[event.pid].append(io_data)
+        self.io_columns.append(event.pid, event.ts, event.bytes, event.is_read,
+                               event.comm, event.filename)
     
     def _handle_net_event(self, cpu, data, size):
         """Handle network events"""
         
         event = self.bpf["net_events"].event(data)
         
-        net_data = {
-            'timestamp': event.ts,
-            'pid': event.pid,
-            'bytes': event.bytes,
-            'is_send': bool(event.is_send),
-            'protocol': event.protocol,
-            'comm': event.comm.decode('utf-8', 'replace')
-        }
-        
-        self.net_events[event.pid].append(net_data)
+        self.net_columns.append(event.pid, event.ts, event.bytes, event.is_send,
+                                event.protocol, event.comm)
     
     def poll_events(self, timeout_ms: int = 100):
         """Poll for new events"""
@@ -456,18 +756,77 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
         except KeyboardInterrupt:
             pass
     
+    def start_polling(self):
+        """Drain the perf buffers continuously on a background thread"""
+        
+        if not self.probes_loaded or self._poll_thread is not None:
+            return
+        
+        self._poll_stop.clear()
+        self._poll_thread = threading.Thread(target=self._drain_loop, name='ebpf-poll', daemon=True)
+        self._poll_thread.start()
+    
+    def stop_polling(self):
+        """Stop the background polling thread"""
+        
+        if self._poll_thread is None:
+            return
+        
+        self._poll_stop.set()
+        self._poll_thread.join(timeout=5)
+        self._poll_thread = None
+    
+    def _drain_loop(self):
+        """Poll the perf buffers until stop_polling is called"""
+        
+        # Optionally keep the reader on one CPU so the per-CPU perf rings it
+        # consumes stay cache-warm; unset means no pinning
+        poll_cpu = self.config.get('poll_cpu')
+        if poll_cpu is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, {poll_cpu})
+                logger.debug(f"eBPF poll thread pinned to CPU {poll_cpu}")
+            except OSError as e:
+                logger.warning(f"Could not pin eBPF poll thread to CPU {poll_cpu}: {e}")
+        
+        timeout_ms = self.config.get('poll_interval_ms', 100)
+        backoff = 0.0
+        while not self._poll_stop.is_set():
+            try:
+                self.bpf.perf_buffer_poll(timeout=timeout_ms)
+            except Exception as e:
+                # Keep collecting after transient failures, backing off up to
+                # POLL_MAX_BACKOFF seconds while they persist
+                self.poll_errors += 1
+                backoff = min(max(backoff * 2, timeout_ms / 1000), POLL_MAX_BACKOFF)
+                logger.error(f"Error polling eBPF events (retrying in {backoff:.2f}s): {e}")
+                self._poll_stop.wait(backoff)
+                continue
+            
+            if backoff:
+                logger.info("eBPF event polling recovered")
+                backoff = 0.0
+    
     def get_current_data(self) -> Dict:
-        """Get current monitoring data"""
+        """
+        Get current monitoring data
+        
+        Event data is returned as views over the column stores; command
+        names and filenames stay raw bytes until a caller decodes them
+        (e.g. EventView.comm_str). No polling is done here: events are
+        drained by the start_polling thread or explicit poll_events calls.
+        """
         
-        # Poll for recent events
-        self.poll_events()
+        self._count_syscalls()
+        sched = self.sched_columns.snapshot()
         
         return {
-            'syscall_counts': dict(self.syscall_counts),
-            'sched_events': dict(self.sched_events),
-            'io_events': dict(self.io_events),
-            'net_events': dict(self.net_events),
-            'detailed_syscalls': getattr(self, 'detailed_syscalls', {})
+            'syscall_counts': self.syscall_counts,
+            'syscall_events': self.syscall_columns.snapshot(),
+            'sched_events': SchedEventIndex(sched.columns, sched.tables),
+            'io_arrays': self.io_columns.view('pid', 'bytes', 'is_read', 'ts'),
+            'io_events': self.io_columns.snapshot(),
+            'net_events': self.net_columns.snapshot(),
         }
     
     def set_monitored_pids(self, pids: Set[int]):
@@ -479,6 +838,8 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
     def cleanup(self):
         """Cleanup eBPF resources"""
         
+        self.stop_polling()
+        
         if self.bpf:
             try:
                 # Detach all probes
@@ -489,13 +850,23 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
         
         self.probes_loaded = False
     
+    def _count_syscalls(self):
+        """Fold syscall events received since the last call into syscall_counts"""
+        
+        pids, syscall_ids = self.syscall_columns.view('pid', 'syscall_id')
+        start = self._syscalls_counted
+        if start < len(pids):
+            self.syscall_counts.add(pids[start:], syscall_ids[start:])
+            self._syscalls_counted = len(pids)
+    
     def get_stats(self) -> Dict:
         """Get monitoring statistics"""
         
-        total_syscalls = sum(sum(counts.values()) for counts in self.syscall_counts.values())
-        total_sched_events = sum(len(events) for events in self.sched_events.values())
-        total_io_events = sum(len(events) for events in self.io_events.values())
-        total_net_events = sum(len(events) for events in self.net_events.values())
+        self._count_syscalls()
+        total_syscalls = self.syscall_counts.total()
+        total_sched_events = self.sched_columns.size
+        total_io_events = self.io_columns.size
+        total_net_events = self.net_columns.size
         
         return {
             'uptime_seconds': time.time() - self.start_time,
@@ -504,5 +875,6 @@ int trace_recv_entry(struct pt_regs *ctx, struct socket *sock, struct msghdr *ms
             'total_io_events': total_io_events,
             'total_net_events': total_net_events,
             'monitored_pids': len(self.monitored_pids),
-            'probes_loaded': self.probes_loaded
+            'probes_loaded': self.probes_loaded,
+            'poll_errors': self.poll_errors
         }
\ No newline at end of file
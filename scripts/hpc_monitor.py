@@ -10,6 +10,7 @@ License: MIT
 """
 
 import argparse
+import csv
 import json
 import logging
 import signal
@@ -87,6 +88,7 @@ class HPCMonitor:
         # Initialize eBPF probes
         try:
             self.probe_manager.load_probes()
+            self.probe_manager.start_polling()
             logger.info("eBPF probes loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load eBPF probes: {e}")
@@ -192,15 +194,24 @@ class HPCMonitor:
         # Get current probe data
         probe_data = self.probe_manager.get_current_data()
         
+        # Resolve PIDs for every job with one batched Slurm query
+        pids_by_job = self.slurm.get_job_pids_bulk([job['job_id'] for job in jobs])
+        
+        job_pids = []
         for job in jobs:
+            pids = pids_by_job[job['job_id']]
+            if pids:
+                job_pids.append((job, pids))
+        
+        # Reduce I/O events per PID once for every tracked job
+        all_pids = set().union(*(pids for _, pids in job_pids))
+        io_totals = self.analyzer.io_totals_by_pid(probe_data.get('io_arrays'), all_pids)
+        
+        for job, pids in job_pids:
             job_id = job['job_id']
-            pids = self.slurm.get_job_pids(job_id)
-            
-            if not pids:
-                continue
             
             # Aggregate metrics for all PIDs in the job
-            job_metrics = self.analyzer.aggregate_pid_metrics(pids, probe_data)
+            job_metrics = self.analyzer.aggregate_pid_metrics(pids, probe_data, io_totals)
             
             # Update job data
             if job_id not in self.monitored_jobs:
@@ -259,31 +270,57 @@ class HPCMonitor:
         """Save results to file"""
         
         output_path = Path(output_file)
+        suffix = output_path.suffix.lower()
         
-        if output_path.suffix.lower() == '.json':
+        if suffix == '.json':
             with open(output_path, 'w') as f:
                 json.dump(results, f, indent=2, default=str)
-        elif output_path.suffix.lower() == '.csv':
-            # Convert to CSV format
-            import pandas as pd
+        elif suffix in ('.parquet', '.arrow'):
+            try:
+                import pyarrow as pa
+            except ImportError:
+                logger.error(f"pyarrow is required to write {suffix} output")
+                return
             
-            # Flatten job data for CSV
-            csv_data = []
-            for job in results['jobs']:
-                row = {
-                    'job_id': job['job_id'],
-                    'user': job['user'],
-                    'duration': job['duration_seconds'],
-                    'classification': job['classification'],
-                    **job['metrics']
-                }
-                csv_data.append(row)
+            columns = self._job_columns(results['jobs'])
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values) for values in columns.values()],
+                names=list(columns)
+            )
             
-            df = pd.DataFrame(csv_data)
-            df.to_csv(output_path, index=False)
+            if suffix == '.parquet':
+                import pyarrow.parquet as pq
+                pq.write_table(pa.Table.from_batches([batch]), output_path, compression='zstd')
+            else:
+                with pa.OSFile(str(output_path), 'wb') as sink:
+                    with pa.ipc.new_file(sink, batch.schema) as writer:
+                        writer.write_batch(batch)
+        elif suffix == '.csv':
+            columns = self._job_columns(results['jobs'])
+            
+            with open(output_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(zip(*columns.values()))
         
         logger.info(f"Results saved to {output_path}")
     
+    def _job_columns(self, jobs: List[Dict]) -> Dict[str, List]:
+        """Flatten job reports into one column per field"""
+        
+        columns = {
+            'job_id': [job['job_id'] for job in jobs],
+            'user': [job['user'] for job in jobs],
+            'duration': [job['duration_seconds'] for job in jobs],
+            'classification': [job['classification'] for job in jobs],
+        }
+        
+        metric_names = dict.fromkeys(name for job in jobs for name in job['metrics'])
+        for name in metric_names:
+            columns[name] = [job['metrics'].get(name) for job in jobs]
+        
+        return columns
+    
     def _display_results(self, results: Dict):
         """Display results in terminal"""
         
@@ -325,6 +362,8 @@ class HPCMonitor:
         self.running = False
         if hasattr(self, 'probe_manager'):
             self.probe_manager.cleanup()
+        if hasattr(self, 'slurm'):
+            self.slurm.close()
         logger.info("Monitoring stopped")
 
 
@@ -332,7 +371,7 @@ class HPCMonitor:
 @click.option('--job-id', '-j', help='Specific Slurm job ID to monitor')
 @click.option('--user', '-u', help='Monitor jobs for specific user')
 @click.option('--duration', '-d', type=int, help='Monitoring duration in seconds')
-@click.option('--output', '-o', help='Output file (JSON or CSV)')
+@click.option('--output', '-o', help='Output file (JSON, CSV, Parquet or Arrow)')
 @click.option('--config', '-c', default='config/monitor_config.yaml', help='Configuration file')
 @click.option('--real-time', '-r', is_flag=True, help='Show real-time dashboard')
 @click.option('--filter', '-f', help='Filter events (io, sched, net, all)')
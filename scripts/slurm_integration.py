@@ -9,18 +9,213 @@ Author: Pau Santana
 License: MIT
 """
 
+import functools
 import logging
 import os
+import pwd
 import re
+import selectors
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
-from pathlib import Path
-from typing import Dict, List, Optional, Set
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+from stat import S_ISDIR
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import psutil
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# squeue output columns: job id, name, user, state, time, nodes, cpus, memory, partition
+SQUEUE_FORMAT = '%i,%j,%u,%t,%M,%N,%C,%m,%P'
+
+
+class Job(namedtuple('Job', 'job_id name user state time nodes cpus memory partition')):
+    """
+    One Slurm job (a squeue row)
+    
+    Also readable like a dict (job['user'], job.get('partition')); use
+    _asdict() for JSON output.
+    """
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+# Node name reported for fallback pseudo-jobs
+_HOSTNAME = os.uname().nodename
+
+# Units of the starttime field in /proc/<pid>/stat
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+# Users whose processes are never turned into fallback pseudo-jobs
+SYSTEM_USERS = frozenset({'root', 'daemon', 'nobody'})
+
+# Seconds a "no PIDs found" result is remembered before looking again
+EMPTY_PID_TTL = 2.0
+
+# Root-only directory holding the SlurmCacheServer socket and its authkey
+CACHE_DIR = '/run/ebpf-hpc-monitor'
+
+# Default Unix socket of SlurmCacheServer
+CACHE_SOCKET = os.path.join(CACHE_DIR, 'slurm.sock')
+
+# Default file with the key clients must present to SlurmCacheServer
+CACHE_AUTHKEY_FILE = os.path.join(CACHE_DIR, 'authkey')
+
+# Filter arguments of the running-jobs query
+RUNNING_FILTER = ('--states=RUNNING',)
+
+# Common cgroup v1 hierarchies holding Slurm uid_<uid>/job_<id> directories
+CGROUP_SLURM_ROOTS = (
+    '/sys/fs/cgroup/systemd/slurm',
+    '/sys/fs/cgroup/slurm',
+    '/sys/fs/cgroup/memory/slurm',
+    '/sys/fs/cgroup/cpuset/slurm',
+)
+
+# Job directory in /proc/<pid>/cgroup: cgroup v1 (/slurm/uid_<uid>/job_<id>)
+# and cgroup v2 (/system.slice/slurmstepd.scope/job_<id>)
+CGROUP_JOB_RE = re.compile(rb'/slurm(?:stepd\.scope)?/(?:uid_\d+/)?job_(\d+)')
+
+# SLURM_JOB_ID / SLURM_JOBID entry in a NUL-separated /proc/<pid>/environ
+ENVIRON_JOB_RE = re.compile(rb'(?:^|\0)SLURM_JOB_?ID=(\d+)')
+
+
+def _list_proc_pids() -> List[str]:
+    """PID directory names currently in /proc"""
+    
+    try:
+        with os.scandir('/proc') as entries:
+            return [entry.name for entry in entries if entry.name.isdigit()]
+    except OSError as e:
+        logger.debug(f"Cannot list /proc: {e}")
+        return []
+
+
+@functools.lru_cache(maxsize=None)
+def _username(uid: int) -> str:
+    """User name for a UID (the UID itself if it has no passwd entry)"""
+    
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@functools.lru_cache(maxsize=None)
+def _boot_time() -> float:
+    """System boot time in seconds since the epoch"""
+    
+    with open('/proc/stat', 'rb') as f:
+        for line in f:
+            if line.startswith(b'btime '):
+                return float(line.split()[1])
+    
+    return psutil.boot_time()
+
+
+@functools.lru_cache(maxsize=1024)
+def _environ_pattern(job_id: str):
+    """Compiled pattern matching a SLURM* environ entry whose value contains job_id"""
+    
+    return re.compile(rb'(?:^|\0)[^\0=]*SLURM[^\0=]*=[^\0]*' + re.escape(job_id.encode()))
+
+
+def _iter_proc_basic(skip_users=()) -> Iterator[Tuple[int, str, str, float]]:
+    """
+    Yield (pid, name, username, create_time) for every process
+    
+    Reads /proc/<pid>/status and /proc/<pid>/stat directly; processes of
+    users in skip_users are dropped before their stat file is read.
+    """
+    
+    for pid in _list_proc_pids():
+        try:
+            status = _read_file(f'/proc/{pid}/status')
+            uid_start = status.index(b'\nUid:') + 5
+            username = _username(int(status[uid_start:status.index(b'\n', uid_start)].split()[0]))
+            
+            if username in skip_users:
+                continue
+            
+            stat = _read_file(f'/proc/{pid}/stat')
+        except (OSError, ValueError):
+            continue
+        
+        # comm may contain spaces and parentheses; fields resume after the last ')'
+        comm_end = stat.rindex(b')')
+        name = stat[stat.index(b'(') + 1:comm_end].decode('utf-8', 'replace')
+        start_ticks = int(stat[comm_end + 2:].split()[19])
+        
+        yield int(pid), name, username, _boot_time() + start_ticks / _CLOCK_TICKS
+
+
+def _shared(method):
+    """Answer a public lookup from the Slurm cache server when one is configured"""
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache_server:
+            served, result = self._call_cache_server(method.__name__, args, kwargs)
+            if served:
+                return result
+        return method(self, *args, **kwargs)
+    
+    return wrapper
+
+
+def _read_authkey(path: str) -> bytes:
+    """
+    Read the cache server key from a file only the current user can access
+    
+    Raises PermissionError if the file is owned by another user or is
+    readable or writable by group or others.
+    """
+    
+    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    try:
+        info = os.fstat(fd)
+        if info.st_uid != os.geteuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{path} must be owned by uid {os.geteuid()} with mode 0600")
+        key = os.read(fd, 4096).strip()
+    finally:
+        os.close(fd)
+    
+    if not key:
+        raise PermissionError(f"{path} is empty")
+    return key
+
+
+def _read_file(path: str) -> bytes:
+    """Read a whole (pseudo-)file with raw os.read calls"""
+    
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    
+    return b''.join(chunks)
+
 class SlurmIntegration:
     """
     Handles integration with Slurm workload manager
@@ -28,17 +223,62 @@ class SlurmIntegration:
     
     def __init__(self, config: Dict):
         self.config = config
-        self.slurm_available = self._check_slurm_availability()
-        self.job_cache = {}
-        self.pid_to_job_cache = {}
+        self._slurm_available = None
+        
+        # Optional SlurmCacheServer shared with other monitor processes
+        self.cache_server = config.get('cache_server')
+        self.cache_authkey_file = config.get('cache_authkey_file') or CACHE_AUTHKEY_FILE
+        self._server_conn = None
+        self._server_lock = threading.Lock()
         self.cache_timeout = config.get('cache_timeout', 30)  # 30 seconds
-        self.last_cache_update = 0
         
-        if not self.slurm_available:
-            logger.warning("Slurm not available, using process-based monitoring")
+        # Per-job entries expire independently of each other
+        self.job_cache = TTLCache(maxsize=4096, ttl=self.cache_timeout)
+        self._accounting_cache = TTLCache(maxsize=4096, ttl=self.cache_timeout)
+        self._empty_pid_cache = TTLCache(maxsize=4096, ttl=EMPTY_PID_TTL)
+        
+        # Thread pool for per-job Slurm queries, created on first use
+        self.slurm_concurrency = config.get('slurm_concurrency', 4)
+        self._pool = None
+        
+        self.pid_to_job_cache = {}
+        self._job_pid_index = {}
+        self._index_ts = 0
+        self._index_lock = threading.Lock()
+        
+        # squeue results keyed by filter arguments
+        self.snapshot_ttl = config.get('snapshot_ttl', 60)
+        self._squeue_snapshot = TTLCache(maxsize=256, ttl=self.snapshot_ttl)
+        
+        # Optional long-lived `squeue --iterate` feeding the running jobs map
+        self.persistent_squeue = config.get('persistent_squeue', False)
+        self.squeue_interval = config.get('squeue_interval', 30)
+        self._squeue_proc = None
+        self._squeue_reader = None
+        self._running_jobs_cache = None
+        self._running_index = (None, {})
+        
+        if self.persistent_squeue and self.slurm_available:
+            self.start_squeue_reader()
+    
+    @property
+    def slurm_available(self) -> bool:
+        """Whether Slurm commands are available (looked up on first use)"""
+        
+        if self._slurm_available is None:
+            # A PATH lookup is enough here; no need to fork squeue
+            self._slurm_available = shutil.which('squeue') is not None
+            
+            if not self._slurm_available:
+                logger.warning("Slurm not available, using process-based monitoring")
+        
+        return self._slurm_available
     
     def _check_slurm_availability(self) -> bool:
-        """Check if Slurm commands are available"""
+        """Check that Slurm commands are installed and actually run"""
+        
+        if shutil.which('squeue') is None:
+            return False
         
         try:
             subprocess.run(['squeue', '--version'], 
@@ -47,49 +287,235 @@ class SlurmIntegration:
         except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
             return False
     
-    def get_running_jobs(self) -> List[Dict]:
+    def start_squeue_reader(self):
+        """Start a persistent squeue process that refreshes the running jobs map"""
+        
+        if self._squeue_proc is not None:
+            return
+        
+        cmd = [
+            'squeue',
+            f'--iterate={self.squeue_interval}',
+            *RUNNING_FILTER,
+            f'--format={SQUEUE_FORMAT}',
+            '--noheader'
+        ]
+        
+        try:
+            self._squeue_proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                                 stderr=subprocess.DEVNULL, text=True)
+        except OSError as e:
+            logger.error(f"Could not start persistent squeue: {e}")
+            return
+        
+        self._squeue_reader = threading.Thread(target=self._read_squeue_iterations,
+                                               args=(self._squeue_proc,),
+                                               name='squeue-reader', daemon=True)
+        self._squeue_reader.start()
+    
+    def stop_squeue_reader(self):
+        """Terminate the persistent squeue process"""
+        
+        proc = self._squeue_proc
+        if proc is None:
+            return
+        
+        self._squeue_proc = None
+        self._running_jobs_cache = None
+        
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    
+    def _read_squeue_iterations(self, proc: subprocess.Popen):
+        """Collect squeue output; each iteration ends with an empty line"""
+        
+        jobs = {}
+        for line in proc.stdout:
+            line = line.rstrip('\n')
+            
+            if not line:
+                # Publish the completed iteration with a single reference swap
+                self._running_jobs_cache = jobs
+                jobs = {}
+                continue
+            
+            job = self._parse_squeue_line(line)
+            if job:
+                jobs[job['job_id']] = job
+        
+        if self._squeue_proc is proc:
+            logger.warning("Persistent squeue exited, falling back to squeue calls")
+            self._squeue_proc = None
+            self._running_jobs_cache = None
+    
+    def _call_cache_server(self, method: str, args: tuple, kwargs: Optional[Dict] = None):
+        """
+        Forward a call to the cache server
+        
+        Returns (True, result) when the server answered and (False, None)
+        when it cannot be reached, fails authentication or sends back
+        something unreadable, so that the caller queries Slurm itself.
+        """
+        
+        with self._server_lock:
+            for _ in range(2):
+                try:
+                    if self._server_conn is None:
+                        # Re-read the key on every connect; the server rotates it on restart
+                        authkey = _read_authkey(self.cache_authkey_file)
+                        self._server_conn = Client(self.cache_server, family='AF_UNIX', authkey=authkey)
+                    
+                    self._server_conn.send((method, args, kwargs or {}))
+                    status, result = self._server_conn.recv()
+                    break
+                except Exception as e:
+                    # Reconnect once in case the server restarted
+                    logger.debug(f"Slurm cache server unavailable: {e}")
+                    if self._server_conn is not None:
+                        self._server_conn.close()
+                        self._server_conn = None
+            else:
+                return False, None
+        
+        if status == 'error':
+            logger.error(f"Slurm cache server failed on {method}: {result}")
+            return False, None
+        
+        return True, result
+    
+    def close(self):
+        """Release background resources"""
+        
+        self.stop_squeue_reader()
+        
+        if self._server_conn is not None:
+            self._server_conn.close()
+            self._server_conn = None
+        
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _parse_squeue_line(line: str) -> Optional[Job]:
+        """Parse one row of SQUEUE_FORMAT output"""
+        
+        # Partition is the last column, so at most 8 splits are needed
+        parts = line.split(',', 8)
+        if len(parts) < 9:
+            return None
+        
+        job_id, name, user, state, elapsed, nodes, cpus, memory, partition = parts
+        return Job(job_id, name, user, state, elapsed,
+                   nodes.split('+') if nodes else [], cpus, memory, partition)
+    
+    def _query_squeue(self, *filters: str) -> Optional[List[Job]]:
+        """Run squeue with the given filter arguments, or None if it fails"""
+        
+        # The persistent squeue reader keeps the running jobs map up to date
+        running_jobs = self._running_jobs_cache
+        if filters == RUNNING_FILTER and running_jobs is not None:
+            return list(running_jobs.values())
+        
+        return self._snapshot_squeue(*filters)
+    
+    def _snapshot_squeue(self, *filters: str) -> Optional[List[Job]]:
+        """
+        Run squeue and keep its output in the snapshot cache
+        
+        Results are reused for snapshot_ttl seconds so that repeated
+        queries do not each fork squeue and hit slurmctld. Returns None if
+        squeue fails.
+        """
+        
+        cached = self._squeue_snapshot.get(filters)
+        if cached is not None:
+            return cached
+        
+        try:
+            jobs = list(self._iter_squeue(*filters))
+        except subprocess.CalledProcessError as e:
+            logger.error(f"squeue {' '.join(filters)} failed: {e.stderr}")
+            return None
+        
+        self._squeue_snapshot[filters] = jobs
+        return jobs
+    
+    def _iter_squeue(self, *filters: str, timeout: float = 10) -> Iterator[Job]:
+        """
+        Stream jobs from squeue as its output arrives
+        
+        Raises subprocess.CalledProcessError if squeue fails and
+        subprocess.TimeoutExpired if it runs longer than timeout seconds.
+        """
+        
+        cmd = ['squeue', *filters, f'--format={SQUEUE_FORMAT}', '--noheader']
+        deadline = time.monotonic() + timeout
+        
+        # stderr goes to a file so that warnings can never fill a pipe and stall squeue
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                with selectors.DefaultSelector() as selector:
+                    selector.register(proc.stdout, selectors.EVENT_READ)
+                    pending = b''
+                    while True:
+                        # Wait for output only as long as the deadline allows
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not selector.select(remaining):
+                            raise subprocess.TimeoutExpired(cmd, timeout)
+                        
+                        chunk = os.read(proc.stdout.fileno(), 65536)
+                        if not chunk:
+                            break
+                        
+                        *lines, pending = (pending + chunk).split(b'\n')
+                        for line in lines:
+                            job = self._parse_squeue_line(line.decode('utf-8', 'replace'))
+                            if job:
+                                yield job
+                    
+                    if pending:
+                        job = self._parse_squeue_line(pending.decode('utf-8', 'replace'))
+                        if job:
+                            yield job
+                
+                returncode = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', 'replace')
+                raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+    
+    @_shared
+    def get_running_jobs(self) -> List[Job]:
         """Get list of currently running Slurm jobs"""
         
         if not self.slurm_available:
             return self._get_fallback_jobs()
         
         try:
-            # Use squeue to get running jobs
-            cmd = [
-                'squeue',
-                '--states=RUNNING',
-                '--format=%i,%j,%u,%t,%M,%N,%C,%m',
-                '--noheader'
-            ]
+            jobs = self._query_squeue(*RUNNING_FILTER)
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                logger.error(f"squeue failed: {result.stderr}")
+            if jobs is None:
                 return self._get_fallback_jobs()
             
-            jobs = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split(',')
-                if len(parts) >= 8:
-                    job = {
-                        'job_id': parts[0],
-                        'name': parts[1],
-                        'user': parts[2],
-                        'state': parts[3],
-                        'time': parts[4],
-                        'nodes': parts[5].split('+') if parts[5] else [],
-                        'cpus': parts[6],
-                        'memory': parts[7],
-                        'partition': self._get_job_partition(parts[0])
-                    }
-                    jobs.append(job)
-            
             logger.debug(f"Found {len(jobs)} running Slurm jobs")
-            return jobs
+            return list(jobs)
             
         except subprocess.TimeoutExpired:
             logger.error("squeue command timed out")
@@ -98,107 +524,48 @@ class SlurmIntegration:
             logger.error(f"Error getting Slurm jobs: {e}")
             return self._get_fallback_jobs()
     
-    def get_job_info(self, job_id: str) -> List[Dict]:
+    @_shared
+    def get_job_info(self, job_id: str) -> List[Job]:
         """Get information for a specific job"""
         
         if not self.slurm_available:
             return self._get_fallback_jobs()
         
         try:
-            cmd = [
-                'squeue',
-                '--job', job_id,
-                '--format=%i,%j,%u,%t,%M,%N,%C,%m,%P',
-                '--noheader'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                logger.error(f"squeue failed for job {job_id}: {result.stderr}")
-                return []
-            
-            jobs = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split(',')
-                if len(parts) >= 9:
-                    job = {
-                        'job_id': parts[0],
-                        'name': parts[1],
-                        'user': parts[2],
-                        'state': parts[3],
-                        'time': parts[4],
-                        'nodes': parts[5].split('+') if parts[5] else [],
-                        'cpus': parts[6],
-                        'memory': parts[7],
-                        'partition': parts[8]
-                    }
-                    jobs.append(job)
-            
-            return jobs
+            return list(self._query_squeue('--job', job_id) or [])
             
         except Exception as e:
             logger.error(f"Error getting job info for {job_id}: {e}")
             return []
     
-    def get_user_jobs(self, username: str) -> List[Dict]:
+    @_shared
+    def get_user_jobs(self, username: str) -> List[Job]:
         """Get jobs for a specific user"""
         
         if not self.slurm_available:
             return self._get_fallback_jobs(user_filter=username)
         
         try:
-            cmd = [
-                'squeue',
-                '--user', username,
-                '--states=RUNNING',
-                '--format=%i,%j,%u,%t,%M,%N,%C,%m,%P',
-                '--noheader'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                logger.error(f"squeue failed for user {username}: {result.stderr}")
-                return []
-            
-            jobs = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split(',')
-                if len(parts) >= 9:
-                    job = {
-                        'job_id': parts[0],
-                        'name': parts[1],
-                        'user': parts[2],
-                        'state': parts[3],
-                        'time': parts[4],
-                        'nodes': parts[5].split('+') if parts[5] else [],
-                        'cpus': parts[6],
-                        'memory': parts[7],
-                        'partition': parts[8]
-                    }
-                    jobs.append(job)
-            
-            return jobs
+            # Served from the running-jobs snapshot shared with get_running_jobs
+            jobs = self._query_squeue(*RUNNING_FILTER) or []
+            return [job for job in jobs if job['user'] == username]
             
         except Exception as e:
             logger.error(f"Error getting jobs for user {username}: {e}")
             return []
     
+    @_shared
     def get_job_pids(self, job_id: str) -> Set[int]:
         """Get PIDs associated with a Slurm job"""
         
         # Check cache first
-        current_time = time.time()
-        if (job_id in self.job_cache and 
-            current_time - self.last_cache_update < self.cache_timeout):
-            return self.job_cache[job_id]
+        pids = self.job_cache.get(job_id)
+        if pids is not None:
+            return pids
+        
+        # Jobs without PIDs yet (e.g. just started) are retried after a short delay
+        if job_id in self._empty_pid_cache:
+            return set()
         
         pids = set()
         
@@ -210,33 +577,113 @@ class SlurmIntegration:
             pids = self._get_pids_by_process_inspection(job_id)
         
         # Update cache
-        self.job_cache[job_id] = pids
-        self.last_cache_update = current_time
+        self._cache_job_pids(job_id, pids)
         
         return pids
     
-    def _get_slurm_job_pids(self, job_id: str) -> Set[int]:
-        """Get PIDs using Slurm-specific methods"""
+    def _cache_job_pids(self, job_id: str, pids: Set[int]):
+        """Cache a PID lookup; empty results only for EMPTY_PID_TTL seconds"""
         
-        pids = set()
+        if pids:
+            self.job_cache[job_id] = pids
+            self._empty_pid_cache.pop(job_id, None)
+        else:
+            self._empty_pid_cache[job_id] = True
+    
+    @_shared
+    def get_job_pids_bulk(self, job_ids: List[str]) -> Dict[str, Set[int]]:
+        """Get PIDs for several jobs, with a single sstat call for all of them"""
+        
+        result = {}
+        missing = []
+        for job_id in job_ids:
+            pids = self.job_cache.get(job_id)
+            if pids is not None:
+                result[job_id] = pids
+            elif job_id in self._empty_pid_cache:
+                result[job_id] = set()
+            else:
+                missing.append(job_id)
+        
+        if missing:
+            slurm_pids = {}
+            if self.slurm_available:
+                sstat_pids = self._get_sstat_pids(missing)
+                
+                if sstat_pids is None:
+                    # Batched sstat refused: query the jobs one by one, concurrently
+                    slurm_pids = self._get_job_pids_concurrently(missing)
+                else:
+                    for job_id in missing:
+                        slurm_pids[job_id] = sstat_pids.get(job_id) or self._get_fallback_slurm_pids(job_id)
+            
+            unresolved = []
+            for job_id in missing:
+                pids = slurm_pids.get(job_id, set())
+                result[job_id] = pids
+                if not pids:
+                    unresolved.append(job_id)
+            
+            # Fallback: one process inspection sweep for every unresolved job
+            if unresolved:
+                result.update(self._inspect_processes(unresolved))
+            
+            for job_id in missing:
+                self._cache_job_pids(job_id, result[job_id])
+        
+        return result
+    
+    def _get_job_pids_concurrently(self, job_ids: List[str]) -> Dict[str, Set[int]]:
+        """Run _get_slurm_job_pids for each job on the thread pool"""
+        
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.slurm_concurrency,
+                                            thread_name_prefix='slurm-query')
+        
+        futures = {job_id: self._pool.submit(self._get_slurm_job_pids, job_id) for job_id in job_ids}
+        return {job_id: future.result() for job_id, future in futures.items()}
+    
+    def _get_sstat_pids(self, job_ids: List[str]) -> Optional[Dict[str, Set[int]]]:
+        """Get PIDs of running job steps from sstat, keyed by job ID (None if sstat fails)"""
+        
+        pids = {}
         
-        # Method 1: Use sstat to get process information
         try:
-            cmd = ['sstat', '--job', job_id, '--format=JobID,AvePID', '--parsable2', '--noheader']
+            cmd = ['sstat', '--job', ','.join(job_ids), '--format=JobID,AvePID', '--parsable2', '--noheader']
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
             
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if '|' in line:
-                        parts = line.split('|')
-                        if len(parts) >= 2 and parts[1].isdigit():
-                            pids.add(int(parts[1]))
+            if result.returncode != 0:
+                return None
+            
+            for line in result.stdout.strip().split('\n'):
+                if '|' in line:
+                    parts = line.split('|')
+                    if len(parts) >= 2 and parts[1].isdigit():
+                        # Step rows look like <job_id>.<step>
+                        job_id = parts[0].split('.', 1)[0]
+                        pids.setdefault(job_id, set()).add(int(parts[1]))
         except Exception as e:
             logger.debug(f"sstat method failed: {e}")
+            return None
+        
+        return pids
+    
+    def _get_slurm_job_pids(self, job_id: str) -> Set[int]:
+        """Get PIDs using Slurm-specific methods"""
+        
+        # Method 1: Use sstat to get process information
+        pids = (self._get_sstat_pids([job_id]) or {}).get(job_id, set())
         
-        # Method 2: Check cgroup information
         if not pids:
-            pids.update(self._get_pids_from_cgroup(job_id))
+            pids = self._get_fallback_slurm_pids(job_id)
+        
+        return pids
+    
+    def _get_fallback_slurm_pids(self, job_id: str) -> Set[int]:
+        """Get PIDs from cgroups or process environments when sstat has none"""
+        
+        # Method 2: Check cgroup information
+        pids = self._get_pids_from_cgroup(job_id)
         
         # Method 3: Check /proc for Slurm environment variables
         if not pids:
@@ -249,108 +696,132 @@ class SlurmIntegration:
         
         pids = set()
         
-        # Common cgroup paths for Slurm
-        cgroup_paths = [
-            f'/sys/fs/cgroup/systemd/slurm/uid_*/job_{job_id}',
-            f'/sys/fs/cgroup/slurm/uid_*/job_{job_id}',
-            f'/sys/fs/cgroup/memory/slurm/uid_*/job_{job_id}',
-            f'/sys/fs/cgroup/cpuset/slurm/uid_*/job_{job_id}'
-        ]
-        
-        for pattern in cgroup_paths:
+        for root in CGROUP_SLURM_ROOTS:
             try:
-                import glob
-                for cgroup_dir in glob.glob(pattern):
-                    cgroup_procs = Path(cgroup_dir) / 'cgroup.procs'
-                    if cgroup_procs.exists():
-                        with open(cgroup_procs, 'r') as f:
-                            for line in f:
-                                pid = line.strip()
-                                if pid.isdigit():
-                                    pids.add(int(pid))
-            except Exception as e:
-                logger.debug(f"Cgroup method failed for {pattern}: {e}")
+                with os.scandir(root) as entries:
+                    uid_dirs = [entry.path for entry in entries if entry.name.startswith('uid_')]
+            except OSError:
+                continue
+            
+            for uid_dir in uid_dirs:
+                try:
+                    data = _read_file(f'{uid_dir}/job_{job_id}/cgroup.procs')
+                except OSError:
+                    continue
+                
+                # cgroup.procs holds only decimal PIDs separated by newlines
+                pids.update(map(int, data.split()))
         
         return pids
     
-    def _get_pids_from_proc_env(self, job_id: str) -> Set[int]:
-        """Get PIDs by checking /proc/*/environ for Slurm variables"""
+    def _build_pid_to_job_map(self):
+        """
+        Map every process to its Slurm job in a single /proc sweep
         
-        pids = set()
+        Fills pid_to_job_cache (pid -> job ID) and the inverse job ID -> PIDs
+        index from /proc/<pid>/cgroup, one small read per process. When no
+        process is in a Slurm cgroup (e.g. no cgroup plugin), falls back to
+        the SLURM_JOB_ID/SLURM_JOBID environment variables.
+        """
         
-        try:
-            for proc in psutil.process_iter(['pid', 'environ']):
-                try:
-                    environ = proc.info['environ'] or {}
-                    
-                    # Check for Slurm environment variables
-                    slurm_job_id = environ.get('SLURM_JOB_ID', '')
-                    slurm_jobid = environ.get('SLURM_JOBID', '')
-                    
-                    if slurm_job_id == job_id or slurm_jobid == job_id:
-                        pids.add(proc.info['pid'])
-                        
-                        # Also add child processes
-                        try:
-                            for child in psutil.Process(proc.info['pid']).children(recursive=True):
-                                pids.add(child.pid)
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            pass
-                            
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                    
-        except Exception as e:
-            logger.debug(f"Proc environ method failed: {e}")
+        pid_to_job = self._scan_proc_cgroups()
+        if not pid_to_job:
+            pid_to_job = self._scan_proc_environ()
         
-        return pids
+        job_pid_index = {}
+        for pid, job_id in pid_to_job.items():
+            job_pid_index.setdefault(job_id, set()).add(pid)
+        
+        self.pid_to_job_cache = pid_to_job
+        self._job_pid_index = job_pid_index
+        self._index_ts = time.time()
     
-    def _get_pids_by_process_inspection(self, job_id: str) -> Set[int]:
-        """Fallback method to find PIDs by process inspection"""
+    def _scan_proc_cgroups(self) -> Dict[int, str]:
+        """Map PIDs to job IDs from the Slurm job cgroup of each process"""
         
-        pids = set()
+        pid_to_job = {}
         
-        try:
-            # Look for processes with job_id in command line or environment
-            for proc in psutil.process_iter(['pid', 'cmdline', 'environ', 'name']):
-                try:
-                    # Check command line
-                    cmdline = ' '.join(proc.info['cmdline'] or [])
-                    if job_id in cmdline:
-                        pids.add(proc.info['pid'])
-                        continue
-                    
-                    # Check environment variables
-                    environ = proc.info['environ'] or {}
-                    for key, value in environ.items():
-                        if 'SLURM' in key and job_id in str(value):
-                            pids.add(proc.info['pid'])
-                            break
-                            
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                    
-        except Exception as e:
-            logger.debug(f"Process inspection failed: {e}")
+        for pid in _list_proc_pids():
+            try:
+                data = _read_file(f'/proc/{pid}/cgroup')
+            except OSError:
+                continue
+            
+            match = CGROUP_JOB_RE.search(data)
+            if match:
+                pid_to_job[int(pid)] = match.group(1).decode()
         
-        return pids
+        return pid_to_job
     
-    def _get_job_partition(self, job_id: str) -> str:
-        """Get partition for a job"""
+    def _scan_proc_environ(self) -> Dict[int, str]:
+        """Map PIDs to job IDs from the Slurm environment of each process"""
         
-        try:
-            cmd = ['squeue', '--job', job_id, '--format=%P', '--noheader']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
+        pid_to_job = {}
+        
+        for pid in _list_proc_pids():
+            try:
+                environ = _read_file(f'/proc/{pid}/environ')
+            except OSError:
+                continue
             
-            if result.returncode == 0:
-                return result.stdout.strip()
+            match = ENVIRON_JOB_RE.search(environ)
+            if match:
+                pid_to_job[int(pid)] = match.group(1).decode()
+        
+        return pid_to_job
+    
+    def _get_pids_from_proc_env(self, job_id: str) -> Set[int]:
+        """Get PIDs by checking /proc/*/cgroup (or environ) for Slurm jobs"""
+        
+        # One sweep serves every job until the index is older than cache_timeout;
+        # concurrent callers (the query pool) wait for a single rebuild
+        if time.time() - self._index_ts >= self.cache_timeout:
+            with self._index_lock:
+                if time.time() - self._index_ts >= self.cache_timeout:
+                    self._build_pid_to_job_map()
+        
+        return set(self._job_pid_index.get(job_id, ()))
+    
+    def _get_pids_by_process_inspection(self, job_id: str) -> Set[int]:
+        """Fallback method to find PIDs by process inspection"""
+        
+        return self._inspect_processes([job_id])[job_id]
+    
+    def _inspect_processes(self, job_ids: List[str]) -> Dict[str, Set[int]]:
+        """Find PIDs for several jobs by process inspection in a single sweep"""
+        
+        pids = {job_id: set() for job_id in job_ids}
+        
+        # job_id as bytes, and a pattern for a SLURM* variable whose value contains it
+        needles = [(job_id, job_id.encode(), _environ_pattern(job_id)) for job_id in job_ids]
+        
+        # Look for processes with job_id in command line or environment
+        for pid in _list_proc_pids():
+            try:
+                # Check command line
+                cmdline = _read_file(f'/proc/{pid}/cmdline').replace(b'\0', b' ')
+                unmatched = []
+                for job_id, needle, pattern in needles:
+                    if needle in cmdline:
+                        pids[job_id].add(int(pid))
+                    else:
+                        unmatched.append((job_id, pattern))
                 
-        except Exception:
-            pass
+                if not unmatched:
+                    continue
+                
+                # Check environment variables, read only when still needed
+                environ = _read_file(f'/proc/{pid}/environ')
+                for job_id, pattern in unmatched:
+                    if pattern.search(environ):
+                        pids[job_id].add(int(pid))
+                        
+            except OSError:
+                continue
         
-        return 'unknown'
+        return pids
     
-    def _get_fallback_jobs(self, user_filter: Optional[str] = None) -> List[Dict]:
+    def _get_fallback_jobs(self, user_filter: Optional[str] = None) -> List[Job]:
         """Fallback method when Slurm is not available"""
         
         jobs = []
@@ -358,55 +829,61 @@ class SlurmIntegration:
         try:
             # Create pseudo-jobs based on running processes
             job_counter = 1
+            current_time = time.time()
             
-            for proc in psutil.process_iter(['pid', 'username', 'name', 'cmdline', 'create_time']):
-                try:
-                    # Filter by user if specified
-                    if user_filter and proc.info['username'] != user_filter:
-                        continue
-                    
-                    # Skip system processes
-                    if proc.info['username'] in ['root', 'daemon', 'nobody']:
-                        continue
-                    
-                    # Create a pseudo-job for each user process
-                    job = {
-                        'job_id': f'proc_{job_counter}',
-                        'name': proc.info['name'],
-                        'user': proc.info['username'],
-                        'state': 'RUNNING',
-                        'time': str(int(time.time() - proc.info['create_time'])),
-                        'nodes': [os.uname().nodename],
-                        'cpus': '1',
-                        'memory': 'unknown',
-                        'partition': 'fallback'
-                    }
-                    
-                    jobs.append(job)
-                    job_counter += 1
-                    
-                    # Limit to avoid too many pseudo-jobs
-                    if len(jobs) >= 50:
-                        break
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            # Skip system processes
+            for pid, name, username, create_time in _iter_proc_basic(SYSTEM_USERS):
+                # Filter by user if specified
+                if user_filter and username != user_filter:
                     continue
+                
+                # Create a pseudo-job for each user process
+                job = Job(
+                    job_id=f'proc_{job_counter}',
+                    name=name,
+                    user=username,
+                    state='RUNNING',
+                    time=str(int(current_time - create_time)),
+                    nodes=[_HOSTNAME],
+                    cpus='1',
+                    memory='unknown',
+                    partition='fallback'
+                )
+                
+                jobs.append(job)
+                job_counter += 1
+                
+                # Limit to avoid too many pseudo-jobs
+                if len(jobs) >= 50:
+                    break
                     
         except Exception as e:
             logger.error(f"Fallback job detection failed: {e}")
         
         return jobs
     
+    @_shared
     def get_job_accounting_info(self, job_id: str) -> Dict:
         """Get accounting information for a completed job"""
         
-        if not self.slurm_available:
+        info = self._accounting_cache.get(job_id)
+        if info is None:
+            info = self.get_job_accounting_info_bulk([job_id]).get(job_id, {})
+        
+        return info
+    
+    def get_job_accounting_info_bulk(self, job_ids: List[str]) -> Dict[str, Dict]:
+        """Get accounting information for several jobs with a single sacct call"""
+        
+        if not self.slurm_available or not job_ids:
             return {}
         
+        accounting = {}
+        
         try:
             cmd = [
                 'sacct',
-                '--job', job_id,
+                '--jobs', ','.join(job_ids),
                 '--format=JobID,JobName,User,Partition,State,ExitCode,Start,End,Elapsed,CPUTime,MaxRSS,MaxVMSize',
                 '--parsable2',
                 '--noheader'
@@ -415,84 +892,79 @@ class SlurmIntegration:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
             
             if result.returncode != 0:
-                logger.error(f"sacct failed for job {job_id}: {result.stderr}")
+                logger.error(f"sacct failed for jobs {','.join(job_ids)}: {result.stderr}")
                 return {}
             
-            lines = result.stdout.strip().split('\n')
-            if not lines or not lines[0]:
-                return {}
+            for line in result.stdout.strip().split('\n'):
+                parts = line.split('|')
+                
+                # Keep the main job row, skip step rows (<job_id>.<step>)
+                if len(parts) >= 12 and '.' not in parts[0] and parts[0] not in accounting:
+                    accounting[parts[0]] = {
+                        'job_id': parts[0],
+                        'job_name': parts[1],
+                        'user': parts[2],
+                        'partition': parts[3],
+                        'state': parts[4],
+                        'exit_code': parts[5],
+                        'start_time': parts[6],
+                        'end_time': parts[7],
+                        'elapsed': parts[8],
+                        'cpu_time': parts[9],
+                        'max_rss': parts[10],
+                        'max_vmsize': parts[11]
+                    }
             
-            # Parse the first line (main job info)
-            parts = lines[0].split('|')
-            if len(parts) >= 12:
-                return {
-                    'job_id': parts[0],
-                    'job_name': parts[1],
-                    'user': parts[2],
-                    'partition': parts[3],
-                    'state': parts[4],
-                    'exit_code': parts[5],
-                    'start_time': parts[6],
-                    'end_time': parts[7],
-                    'elapsed': parts[8],
-                    'cpu_time': parts[9],
-                    'max_rss': parts[10],
-                    'max_vmsize': parts[11]
-                }
+            self._accounting_cache.update(accounting)
                 
         except Exception as e:
-            logger.error(f"Error getting accounting info for job {job_id}: {e}")
+            logger.error(f"Error getting accounting info for jobs {','.join(job_ids)}: {e}")
         
-        return {}
+        return accounting
     
+    @_shared
     def is_job_running(self, job_id: str) -> bool:
         """Check if a job is currently running"""
         
-        jobs = self.get_job_info(job_id)
-        return any(job['state'] == 'RUNNING' for job in jobs)
+        if not self.slurm_available:
+            return False
+        
+        try:
+            return job_id in self._running_jobs()
+        except Exception as e:
+            logger.error(f"Error checking state of job {job_id}: {e}")
+            return False
     
-    def get_node_jobs(self, node_name: str) -> List[Dict]:
+    def _running_jobs(self) -> Dict[str, Job]:
+        """Running jobs keyed by job ID"""
+        
+        # Kept current by the persistent squeue reader when it is enabled
+        running_jobs = self._running_jobs_cache
+        if running_jobs is not None:
+            return running_jobs
+        
+        # Otherwise index the squeue snapshot once per refresh; a new
+        # snapshot is a new list, so identity tells whether it changed
+        jobs = self._snapshot_squeue(*RUNNING_FILTER)
+        if jobs is None:
+            return {}
+        
+        index = self._running_index
+        if index[0] is not jobs:
+            index = (jobs, {job.job_id: job for job in jobs})
+            self._running_index = index
+        
+        return index[1]
+    
+    @_shared
+    def get_node_jobs(self, node_name: str) -> List[Job]:
         """Get jobs running on a specific node"""
         
         if not self.slurm_available:
             return []
         
         try:
-            cmd = [
-                'squeue',
-                '--nodelist', node_name,
-                '--states=RUNNING',
-                '--format=%i,%j,%u,%t,%M,%N,%C,%m,%P',
-                '--noheader'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                logger.error(f"squeue failed for node {node_name}: {result.stderr}")
-                return []
-            
-            jobs = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split(',')
-                if len(parts) >= 9:
-                    job = {
-                        'job_id': parts[0],
-                        'name': parts[1],
-                        'user': parts[2],
-                        'state': parts[3],
-                        'time': parts[4],
-                        'nodes': parts[5].split('+') if parts[5] else [],
-                        'cpus': parts[6],
-                        'memory': parts[7],
-                        'partition': parts[8]
-                    }
-                    jobs.append(job)
-            
-            return jobs
+            return list(self._query_squeue('--nodelist', node_name, '--states=RUNNING') or [])
             
         except Exception as e:
             logger.error(f"Error getting jobs for node {node_name}: {e}")
@@ -502,6 +974,167 @@ class SlurmIntegration:
         """Clear the PID cache"""
         
         self.job_cache.clear()
+        self._accounting_cache.clear()
+        self._empty_pid_cache.clear()
         self.pid_to_job_cache.clear()
-        self.last_cache_update = 0
-        logger.debug("Slurm cache cleared")
\ No newline at end of file
+        self._job_pid_index.clear()
+        self._index_ts = 0
+        self._squeue_snapshot.clear()
+        self._running_index = (None, {})
+        logger.debug("Slurm cache cleared")
+
+
+class SlurmCacheServer:
+    """
+    Shares one SlurmIntegration (and its caches) with other processes
+    
+    Runs a persistent squeue reader and answers SlurmIntegration clients
+    configured with cache_server=<socket path>, so the load on slurmctld
+    does not grow with the number of monitor processes.
+    """
+    
+    # Public lookups clients may forward
+    METHODS = frozenset({
+        'get_running_jobs', 'get_job_info', 'get_user_jobs', 'get_node_jobs',
+        'is_job_running', 'get_job_pids', 'get_job_pids_bulk', 'get_job_accounting_info',
+    })
+    
+    def __init__(self, config: Dict, address: str = CACHE_SOCKET,
+                 authkey_file: str = CACHE_AUTHKEY_FILE):
+        self.address = address
+        self.authkey_file = authkey_file
+        self._authkey = None
+        self.slurm = SlurmIntegration(dict(
+            config,
+            cache_server=None,
+            persistent_squeue=config.get('persistent_squeue', True)
+        ))
+        self._lock = threading.Lock()
+        self._listener = None
+    
+    @staticmethod
+    def _private_dir(path: str):
+        """Create path as a 0700 directory, refusing one another user controls"""
+        
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        
+        info = os.lstat(path)
+        if not S_ISDIR(info.st_mode) or info.st_uid != os.geteuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{path} must be a directory owned by uid {os.geteuid()} with mode 0700")
+    
+    def serve_forever(self):
+        """Accept clients until close() is called"""
+        
+        # Nothing created below is ever accessible to other users, not even briefly
+        old_umask = os.umask(0o077)
+        try:
+            for path in {os.path.dirname(self.address), os.path.dirname(self.authkey_file)}:
+                self._private_dir(path or '.')
+            
+            # A fresh key per server start; clients read it when they connect
+            self._authkey = os.urandom(32).hex().encode()
+            fd = os.open(f'{self.authkey_file}.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+            try:
+                os.write(fd, self._authkey)
+            finally:
+                os.close(fd)
+            os.replace(f'{self.authkey_file}.tmp', self.authkey_file)
+            
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            
+            self._listener = Listener(self.address, family='AF_UNIX')
+        finally:
+            os.umask(old_umask)
+        
+        logger.info(f"Slurm cache server listening on {self.address}")
+        
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+                
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+    
+    def _serve_client(self, conn):
+        """Answer requests from one client connection"""
+        
+        with conn:
+            # Authenticate here rather than in accept() so a stalled client
+            # cannot block the listener
+            try:
+                deliver_challenge(conn, self._authkey)
+                answer_challenge(conn, self._authkey)
+            except Exception as e:
+                logger.warning(f"Rejected Slurm cache client: {e}")
+                return
+            
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    logger.warning(f"Dropping Slurm cache client after a bad request: {e}")
+                    return
+                
+                if method not in self.METHODS:
+                    conn.send(('error', f"unknown method {method!r}"))
+                    continue
+                
+                try:
+                    with self._lock:
+                        result = getattr(self.slurm, method)(*args, **kwargs)
+                    conn.send(('ok', result))
+                except Exception as e:
+                    conn.send(('error', str(e)))
+    
+    def close(self):
+        """Stop serving and release resources"""
+        
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        
+        self.slurm.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    import yaml
+    
+    # Use the importable module so pickled Job rows resolve on the clients
+    from slurm_integration import CACHE_AUTHKEY_FILE, CACHE_SOCKET, SlurmCacheServer
+    
+    parser = argparse.ArgumentParser(description='Shared Slurm cache server for eBPF HPC monitors')
+    parser.add_argument('--config', '-c', default='config/monitor_config.yaml',
+                        help='Configuration file (its slurm section is used)')
+    parser.add_argument('--socket', default=CACHE_SOCKET, help='Unix socket to listen on')
+    parser.add_argument('--authkey-file', default=CACHE_AUTHKEY_FILE,
+                        help='File the client authentication key is written to')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    try:
+        with open(args.config, 'r') as f:
+            config_data = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        logger.warning(f"Config file {args.config} not found, using defaults")
+        config_data = {}
+    
+    server = SlurmCacheServer(config_data.get('slurm') or {}, args.socket, args.authkey_file)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -47,6 +47,7 @@ setup(
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
+            "pytest-xdist>=3.0.0",
             "black>=22.0.0",
             "flake8>=5.0.0",
             "mypy>=0.991",
@@ -58,6 +59,12 @@ setup(
         "prometheus": [
             "prometheus-client>=0.14.0",
         ],
+        "jit": [
+            "numba>=0.56.0",
+        ],
+        "arrow": [
+            "pyarrow>=8.0.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,47 @@
+"""
+Sample-data loaders shared by the test modules
+
+Each file is parsed once per process, so every test class's setUpClass
+can load it cheaply under both pytest and the unittest runner.
+"""
+
+import functools
+from pathlib import Path
+
+try:
+    import orjson
+    _loads = orjson.loads
+    dumps = orjson.dumps
+except ImportError:
+    import json
+    _loads = json.loads
+    
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+@functools.lru_cache(maxsize=1)
+def _yaml():
+    """Import PyYAML on first use"""
+    import yaml
+    return yaml
+
+@functools.lru_cache(maxsize=None)
+def load_yaml(path):
+    """Parse a YAML file once per process (None if it does not exist)"""
+    if not path.exists():
+        return None
+    yaml = _yaml()
+    # libyaml's C loader when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=loader)
+
+@functools.lru_cache(maxsize=None)
+def load_json(path):
+    """Parse a JSON file once per process (None if it does not exist)"""
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        return _loads(f.read())
@@ -12,66 +12,128 @@ License: MIT
 import unittest
 import sys
 import os
-import json
+import re
+import time
+import shutil
+import subprocess
+import contextlib
 import tempfile
+from collections import namedtuple
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import patch
 
-# Add the scripts directory to the path
+import numpy as np
+
+# Add the tests and scripts directories to the path
+sys.path.insert(0, str(Path(__file__).parent))
 sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
 
+from helpers import PROJECT_ROOT, dumps, load_json, load_yaml
+
 try:
-    from data_analyzer import JobAnalyzer, JobClassifier
-    from slurm_integration import SlurmIntegration
+    from data_analyzer import CLASSIFY_COLUMNS, EVENT_TYPES, JobAnalyzer, JobClassifier
+    from slurm_integration import SlurmIntegration, _read_authkey
 except ImportError as e:
     print(f"Warning: Could not import modules: {e}")
     print("Some tests may be skipped")
 
+# ebpf_probes needs the bcc Python bindings
+try:
+    from ebpf_probes import MAX_SYSCALLS, SchedEventIndex, SyscallCountMatrix
+    _HAS_BCC = True
+except ImportError:
+    _HAS_BCC = False
+
+# Live Slurm tests only run where the Slurm client tools are installed
+_HAS_SLURM = shutil.which('squeue') is not None
+
+# Lightweight stand-in for subprocess.CompletedProcess
+FakeProc = namedtuple('FakeProc', ['returncode', 'stdout', 'stderr'])
+FakeProc.__new__.__defaults__ = (0, '', '')
+
+class FakePopen:
+    """subprocess.Popen stand-in that streams canned output through a real pipe"""
+    
+    def __init__(self, output='', errors='', returncode=0, stderr=None, **popen_kwargs):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, output.encode())
+        os.close(write_fd)
+        self.stdout = os.fdopen(read_fd, 'rb')
+        if errors and stderr is not None:
+            stderr.write(errors.encode())
+        self.returncode = returncode
+    
+    def poll(self):
+        return self.returncode
+    
+    def wait(self, timeout=None):
+        return self.returncode
+    
+    def kill(self):
+        pass
+
+# Minimal os.DirEntry stand-in for faking os.scandir('/proc')
+FakeDirEntry = namedtuple('FakeDirEntry', ['name'])
+
+# ASCII digits, deleted via bytes.translate to validate job IDs
+_DIGITS = b'0123456789'
+
+BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+# Words marking an I/O-related recommendation
+_IO_KEYWORDS = re.compile(r'\b(?:i/o|io|storage|disk)\b', re.IGNORECASE)
+
 class TestJobAnalyzer(unittest.TestCase):
     """
     Test cases for JobAnalyzer class
     """
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.analyzer = JobAnalyzer()
-        
+    @classmethod
+    def setUpClass(cls):
+        """Build the shared, read-only sample events once"""
         # Sample event data for testing
-        self.sample_events = [
-            {
+        cls.SAMPLE_EVENTS = (
+            MappingProxyType({
                 'type': 'syscall',
                 'name': 'read',
                 'pid': 1234,
                 'duration': 5000,  # nanoseconds
                 'timestamp': 1642248000000000000
-            },
-            {
+            }),
+            MappingProxyType({
                 'type': 'syscall',
                 'name': 'write',
                 'pid': 1234,
                 'duration': 3000,
                 'timestamp': 1642248001000000000
-            },
-            {
+            }),
+            MappingProxyType({
                 'type': 'sched_switch',
                 'pid': 1234,
                 'prev_state': 'R',
                 'next_pid': 5678,
                 'timestamp': 1642248002000000000
-            },
-            {
+            }),
+            MappingProxyType({
                 'type': 'io_event',
                 'operation': 'read',
                 'pid': 1234,
                 'bytes': 4096,
                 'timestamp': 1642248003000000000
-            }
-        ]
+            })
+        )
+        cls.SAMPLE_EVENTS_LIST = list(cls.SAMPLE_EVENTS)
+        cls.SAMPLE_SOA = JobAnalyzer()._events_to_columns(cls.SAMPLE_EVENTS)
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.analyzer = JobAnalyzer()
     
     def test_aggregate_metrics_basic(self):
         """Test basic metrics aggregation"""
-        pids = [1234]
-        metrics = self.analyzer.aggregate_metrics(self.sample_events, pids)
+        pids = frozenset({1234})
+        metrics = self.analyzer.aggregate_metrics(self.SAMPLE_SOA, pids)
         
         # Check that metrics are returned
         self.assertIsInstance(metrics, dict)
@@ -84,9 +146,15 @@ class TestJobAnalyzer(unittest.TestCase):
         self.assertEqual(metrics['context_switches'], 1)
         self.assertEqual(metrics['total_io_bytes'], 4096)
     
+    def test_aggregate_metrics_list_matches_soa(self):
+        """Test that list and columnar event inputs give the same metrics"""
+        pids = frozenset({1234})
+        self.assertEqual(self.analyzer.aggregate_metrics(self.SAMPLE_EVENTS_LIST, pids),
+                         self.analyzer.aggregate_metrics(self.SAMPLE_SOA, pids))
+    
     def test_aggregate_metrics_empty_events(self):
         """Test metrics aggregation with empty events"""
-        pids = [1234]
+        pids = frozenset({1234})
         metrics = self.analyzer.aggregate_metrics([], pids)
         
         # Should return default values
@@ -96,11 +164,84 @@ class TestJobAnalyzer(unittest.TestCase):
     
     def test_aggregate_metrics_no_pids(self):
         """Test metrics aggregation with no PIDs"""
-        metrics = self.analyzer.aggregate_metrics(self.sample_events, [])
+        metrics = self.analyzer.aggregate_metrics(self.SAMPLE_SOA, frozenset())
         
         # Should still process events but may have different results
         self.assertIsInstance(metrics, dict)
     
+    def test_aggregate_metrics_splits_net_bytes(self):
+        """Test that network bytes are split into sent and received"""
+        events = [
+            {'type': 'net_event', 'pid': 1234, 'bytes': 1500, 'is_send': True, 'timestamp': 1},
+            {'type': 'net_event', 'pid': 1234, 'bytes': 500, 'is_send': False, 'timestamp': 2},
+            {'type': 'net_event', 'pid': 9999, 'bytes': 700, 'is_send': True, 'timestamp': 3},
+        ]
+        
+        metrics = self.analyzer.aggregate_metrics(events, frozenset({1234}))
+        
+        self.assertEqual(metrics['send_bytes'], 1500)
+        self.assertEqual(metrics['recv_bytes'], 500)
+        self.assertEqual(metrics['total_net_bytes'], 2000)
+        self.assertEqual(metrics['net_operations'], 2)
+    
+    def test_aggregate_metrics_scales_with_many_pids(self):
+        """Test aggregation over a job with thousands of PIDs"""
+        event_pids = np.arange(50_000, dtype=np.int64) % 20_000
+        count = len(event_pids)
+        events = {
+            'type': np.where(event_pids % 5 == 0, EVENT_TYPES['sched_switch'],
+                             EVENT_TYPES['syscall']).astype(np.int8),
+            'pid': event_pids,
+            'next_pid': (event_pids + 1) % 20_000,
+            'bytes': np.zeros(count, dtype=np.int64),
+            'duration': np.full(count, 100, dtype=np.int64),
+            'timestamp': np.arange(count, dtype=np.int64),
+        }
+        pids = frozenset(range(0, 20_000, 2))
+        
+        metrics = self.analyzer.aggregate_metrics(events, pids)
+        
+        selected = np.isin(event_pids, list(pids))
+        is_sched = events['type'] == EVENT_TYPES['sched_switch']
+        switched_in = np.isin(events['next_pid'], list(pids))
+        self.assertEqual(metrics['monitored_pids'], 10_000)
+        self.assertEqual(metrics['total_syscalls'], int(np.count_nonzero(selected & ~is_sched)))
+        self.assertEqual(metrics['context_switches'],
+                         int(np.count_nonzero((selected | switched_in) & is_sched)))
+    
+    def test_io_totals_by_pid_with_large_pids(self):
+        """Test per-PID I/O sums for sparse PIDs up to pid_max"""
+        io_arrays = (
+            np.array([4_000_000, 7, 5, 4_000_000, 9, 1], dtype=np.uint32),
+            np.array([10, 20, 30, 40, 50, 60], dtype=np.uint64),
+            np.array([True, False, True, False, True, True]),
+            np.zeros(6, dtype=np.uint64),
+        )
+        
+        totals = self.analyzer.io_totals_by_pid(io_arrays, {5, 7, 8, 4_000_000})
+        
+        self.assertEqual(totals, {5: (30, 0, 1), 7: (0, 20, 1), 4_000_000: (10, 40, 2)})
+    
+    def test_aggregate_pid_metrics_without_probe_data(self):
+        """Test PID aggregation when the probe snapshot has no data yet"""
+        metrics = self.analyzer.aggregate_pid_metrics({1234}, {})
+        
+        self.assertEqual(metrics['total_syscalls'], 0)
+        self.assertEqual(metrics['context_switches'], 0)
+        self.assertEqual(metrics['monitored_pids'], 1)
+    
+    def test_aggregate_metrics_reuses_output_dict(self):
+        """Test that repeated aggregation can fill one result dict"""
+        out = {}
+        out_id = id(out)
+        
+        for _ in range(1000):
+            metrics = self.analyzer.aggregate_metrics(self.SAMPLE_SOA, frozenset({1234}), out=out)
+        
+        self.assertIs(metrics, out)
+        self.assertEqual(id(out), out_id)
+        self.assertEqual(out, self.analyzer.aggregate_metrics(self.SAMPLE_SOA, frozenset({1234})))
+    
     def test_calculate_percentages(self):
         """Test percentage calculations"""
         # Mock some timing data
@@ -111,14 +252,54 @@ class TestJobAnalyzer(unittest.TestCase):
                 'wait_percent': 10.0
             }
             
-            pids = [1234]
-            metrics = self.analyzer.aggregate_metrics(self.sample_events, pids)
+            pids = frozenset({1234})
+            metrics = self.analyzer.aggregate_metrics(self.SAMPLE_EVENTS_LIST, pids)
             
             # Check that percentages are included
             self.assertIn('cpu_percent', metrics)
             self.assertIn('io_percent', metrics)
             self.assertIn('wait_percent', metrics)
 
+@unittest.skipUnless(_HAS_BCC, 'bcc not installed')
+class TestProbeDataStructures(unittest.TestCase):
+    """
+    Test the per-PID event stores filled by EBPFProbeManager
+    """
+    
+    def test_syscall_matrix_grows_past_capacity(self):
+        """Test that the count matrix grows when more PIDs than rows appear"""
+        counts = SyscallCountMatrix(capacity=2)
+        counts.add(np.array([10, 11, 12, 10]), np.array([0, 1, 2, 0]))
+        counts.add(np.array([13]), np.array([1]))
+        
+        self.assertGreaterEqual(len(counts.matrix), 4)
+        self.assertEqual(counts.counts_for([10])[0], 2)
+        self.assertEqual(counts.counts_for([11, 13])[1], 2)
+        self.assertEqual(counts.counts_for([12])[2], 1)
+        self.assertEqual(counts.total(), 5)
+    
+    def test_syscall_matrix_ignores_unknown_ids_and_pids(self):
+        """Test out-of-range syscall ids and never-seen PIDs"""
+        counts = SyscallCountMatrix()
+        counts.add(np.array([10, 10]), np.array([MAX_SYSCALLS, 3]))
+        
+        self.assertEqual(counts.total(), 1)
+        self.assertEqual(counts.counts_for([99]).sum(), 0)
+        self.assertEqual(len(counts.counts_for([10])), MAX_SYSCALLS)
+    
+    def test_sched_index_rows_for(self):
+        """Test per-PID row lookups over both switch roles"""
+        index = SchedEventIndex({
+            'prev_pid': np.array([1, 2, 1, 3]),
+            'next_pid': np.array([2, 1, 3, 1]),
+            'ts': np.array([10, 20, 30, 40]),
+        })
+        
+        self.assertEqual(index.rows_for(1).tolist(), [0, 1, 2, 3])
+        self.assertEqual(index.rows_for(2).tolist(), [0, 1])
+        self.assertEqual(index.rows_for(3).tolist(), [2, 3])
+        self.assertEqual(index.rows_for(9).tolist(), [])
+
 class TestJobClassifier(unittest.TestCase):
     """
     Test cases for JobClassifier class
@@ -223,8 +404,27 @@ class TestJobClassifier(unittest.TestCase):
         self.assertGreater(len(recommendations), 0)
         
         # Should contain I/O-related recommendations
-        rec_text = ' '.join(recommendations).lower()
-        self.assertTrue(any(keyword in rec_text for keyword in ['i/o', 'io', 'storage', 'disk']))
+        self.assertIsNotNone(_IO_KEYWORDS.search(' '.join(recommendations)))
+    
+    def test_classify_jobs_matches_classify_job(self):
+        """Test that batch classification agrees with per-job classification"""
+        rng = np.random.default_rng(42)
+        count = 10_000
+        table = np.column_stack([
+            rng.uniform(0, 110, count),      # cpu_percent
+            rng.uniform(0, 110, count),      # io_percent
+            rng.uniform(0, 110, count),      # wait_percent
+            rng.integers(0, 4000, count),    # context_switches
+            rng.integers(0, 3, count),       # total_syscalls
+        ]).astype(np.float64)
+        
+        labels, scores = self.classifier.classify_jobs(table)
+        
+        self.assertEqual(len(labels), count)
+        for row, label, score in zip(table[:1000].tolist(), labels, scores):
+            metrics = dict(zip(CLASSIFY_COLUMNS, row))
+            self.assertEqual(label, self.classifier.classify_job(metrics))
+            self.assertEqual(score, self.classifier.get_efficiency_score(metrics))
 
 class TestSlurmIntegration(unittest.TestCase):
     """
@@ -242,46 +442,62 @@ class TestSlurmIntegration(unittest.TestCase):
             }
         }
         self.slurm = SlurmIntegration(self.config)
+        
+        run_patcher = patch('subprocess.run')
+        self.mock_run = run_patcher.start()
+        self.addCleanup(run_patcher.stop)
+        
+        popen_patcher = patch('subprocess.Popen')
+        self.mock_popen = popen_patcher.start()
+        self.addCleanup(popen_patcher.stop)
     
-    @patch('subprocess.run')
-    def test_check_slurm_availability_success(self, mock_run):
+    def test_check_slurm_availability_success(self):
         """Test successful Slurm availability check"""
-        mock_run.return_value = Mock(returncode=0, stdout="SLURM 22.05.3")
+        self.mock_run.side_effect = lambda *a, **k: FakeProc(0, "SLURM 22.05.3", '')
         
-        available = self.slurm.check_slurm_availability()
+        with patch('shutil.which', return_value='/usr/bin/squeue'):
+            available = self.slurm._check_slurm_availability()
         self.assertTrue(available)
     
-    @patch('subprocess.run')
-    def test_check_slurm_availability_failure(self, mock_run):
+    def test_check_slurm_availability_failure(self):
         """Test failed Slurm availability check"""
-        mock_run.side_effect = FileNotFoundError()
+        self.mock_run.side_effect = FileNotFoundError()
+        
+        with patch('shutil.which', return_value='/usr/bin/squeue'):
+            available = self.slurm._check_slurm_availability()
+        self.assertFalse(available)
         
-        available = self.slurm.check_slurm_availability()
+        # Without squeue on PATH nothing is run
+        self.mock_run.reset_mock()
+        with patch('shutil.which', return_value=None):
+            available = self.slurm._check_slurm_availability()
         self.assertFalse(available)
+        self.mock_run.assert_not_called()
     
-    @patch('subprocess.run')
-    def test_get_running_jobs_success(self, mock_run):
+    def test_get_running_jobs_success(self):
         """Test getting running jobs successfully"""
-        mock_output = """JOBID|USER|NAME|PARTITION|STATE|NODES|CPUS
-12345|user1|test_job|compute|RUNNING|node01|16
-12346|user2|another_job|compute|RUNNING|node02|8"""
+        # squeue --noheader --format=%i,%j,%u,%t,%M,%N,%C,%m,%P
+        mock_output = """12345,test_job,user1,R,1:02:03,node01,16,4G,compute
+12346,another_job,user2,R,5:00,node02+node03,8,2G,compute
+"""
         
-        mock_run.return_value = Mock(returncode=0, stdout=mock_output)
+        self.slurm._slurm_available = True
+        self.mock_popen.side_effect = lambda *a, **k: FakePopen(mock_output, **k)
         
         jobs = self.slurm.get_running_jobs()
         
         self.assertEqual(len(jobs), 2)
         self.assertEqual(jobs[0]['job_id'], '12345')
         self.assertEqual(jobs[0]['user'], 'user1')
-        self.assertEqual(jobs[0]['state'], 'RUNNING')
+        self.assertEqual(jobs[0]['state'], 'R')
+        self.assertEqual(jobs[1]['nodes'], ['node02', 'node03'])
     
-    @patch('subprocess.run')
-    def test_get_job_info_success(self, mock_run):
+    def test_get_job_info_success(self):
         """Test getting job info successfully"""
-        mock_output = """JOBID|USER|NAME|PARTITION|STATE|NODES|CPUS
-12345|user1|test_job|compute|RUNNING|node01|16"""
+        mock_output = "12345,test_job,user1,R,1:02:03,node01,16,4G,compute\n"
         
-        mock_run.return_value = Mock(returncode=0, stdout=mock_output)
+        self.slurm._slurm_available = True
+        self.mock_popen.side_effect = lambda *a, **k: FakePopen(mock_output, **k)
         
         job_info = self.slurm.get_job_info('12345')
         
@@ -289,50 +505,217 @@ class TestSlurmIntegration(unittest.TestCase):
         self.assertEqual(len(job_info), 1)
         self.assertEqual(job_info[0]['job_id'], '12345')
     
+    def test_squeue_failure_reports_stderr(self):
+        """Test that squeue's stderr, collected in a temporary file, is reported on failure"""
+        self.mock_popen.side_effect = lambda *a, **k: FakePopen(
+            '', 'slurm_load_jobs error: Socket timed out\n', 1, **k
+        )
+        
+        with self.assertRaises(subprocess.CalledProcessError) as ctx:
+            list(self.slurm._iter_squeue('--states=RUNNING'))
+        
+        self.assertIn('Socket timed out', ctx.exception.stderr)
+    
+    def test_squeue_snapshot_is_bounded(self):
+        """Test that per-filter squeue results do not accumulate without bound"""
+        self.slurm._slurm_available = True
+        self.mock_popen.side_effect = lambda *a, **k: FakePopen(
+            "12345,test_job,user1,R,1:02:03,node01,16,4G,compute\n", **k
+        )
+        
+        for job_id in range(1000):
+            self.slurm.get_job_info(str(job_id))
+        
+        self.assertLessEqual(len(self.slurm._squeue_snapshot), self.slurm._squeue_snapshot.maxsize)
+    
+    def test_squeue_iterate_publishes_on_blank_line(self):
+        """Test that each --iterate block is published only once it is complete"""
+        published = []
+        
+        def stdout():
+            yield "12345,test_job,user1,R,1:02:03,node01,16,4G,compute\n"
+            published.append(self.slurm._running_jobs_cache)
+            yield "12346,another_job,user2,R,5:00,node02,8,2G,compute\n"
+            yield "\n"
+            published.append(self.slurm._running_jobs_cache)
+            yield "12347,partial_job,user3,R,0:10,node03,4,1G,compute\n"
+        
+        self.slurm._read_squeue_iterations(SimpleNamespace(stdout=stdout()))
+        
+        self.assertIsNone(published[0])
+        self.assertEqual(sorted(published[1]), ['12345', '12346'])
+        # The unterminated last block is never published
+        self.assertIs(self.slurm._running_jobs_cache, published[1])
+    
+    def test_running_jobs_from_squeue_reader(self):
+        """Test that job state checks use the reader's map without running squeue"""
+        self.slurm._slurm_available = True
+        self.slurm._read_squeue_iterations(SimpleNamespace(stdout=iter([
+            "12345,test_job,user1,R,1:02:03,node01,16,4G,compute\n", "\n"
+        ])))
+        
+        self.assertTrue(self.slurm.is_job_running('12345'))
+        self.assertFalse(self.slurm.is_job_running('99999'))
+        self.mock_popen.assert_not_called()
+    
+    def test_sstat_pids_grouped_by_job(self):
+        """Test that one sstat call is demultiplexed into per-job PIDs by JobID.step"""
+        # sstat --format=JobID,AvePID --parsable2 --noheader
+        self.mock_run.side_effect = lambda *a, **k: FakeProc(0, (
+            "100.batch|4100\n"
+            "100.0|4101\n"
+            "200.0|4200\n"
+        ), '')
+        
+        pids = self.slurm._get_sstat_pids(['100', '200', '300'])
+        
+        self.assertEqual(self.mock_run.call_count, 1)
+        self.assertEqual(pids, {'100': {4100, 4101}, '200': {4200}})
+    
+    def test_bulk_pids_fall_back_for_jobs_without_steps(self):
+        """Test that jobs missing from the sstat output use the fallback lookup"""
+        self.slurm._slurm_available = True
+        self.mock_run.side_effect = lambda *a, **k: FakeProc(0, "100.0|4101\n", '')
+        
+        with patch.object(self.slurm, '_get_fallback_slurm_pids',
+                          side_effect=lambda job_id: {4300} if job_id == '300' else set()) as fallback:
+            pids = self.slurm.get_job_pids_bulk(['100', '300'])
+        
+        self.assertEqual(pids, {'100': {4101}, '300': {4300}})
+        fallback.assert_called_once_with('300')
+    
+    def test_accounting_bulk_keeps_main_rows(self):
+        """Test that bulk sacct keeps one row per job and skips its step rows"""
+        self.slurm._slurm_available = True
+        # sacct --format=JobID,JobName,User,Partition,State,ExitCode,Start,End,Elapsed,CPUTime,MaxRSS,MaxVMSize
+        self.mock_run.side_effect = lambda *a, **k: FakeProc(0, (
+            "100|sim|user1|compute|COMPLETED|0:0|2024-01-15T10:00:00|2024-01-15T11:00:00|01:00:00|16:00:00||\n"
+            "100.batch|batch|||COMPLETED|0:0|2024-01-15T10:00:00|2024-01-15T11:00:00|01:00:00|16:00:00|2G|4G\n"
+            "100.0|sim|||COMPLETED|0:0|2024-01-15T10:00:01|2024-01-15T11:00:00|00:59:59|15:59:44|8G|9G\n"
+            "200|train|user2|gpu|RUNNING|0:0|2024-01-15T10:30:00|Unknown|00:30:00|04:00:00||\n"
+        ), '')
+        
+        accounting = self.slurm.get_job_accounting_info_bulk(['100', '200'])
+        
+        self.assertEqual(sorted(accounting), ['100', '200'])
+        self.assertEqual(accounting['100']['job_name'], 'sim')
+        self.assertEqual(accounting['100']['user'], 'user1')
+        self.assertEqual(accounting['200']['state'], 'RUNNING')
+    
     def test_fallback_mode_process_inspection(self):
         """Test fallback mode using process inspection"""
         # This test uses the fallback mode which doesn't require Slurm
-        with patch('psutil.process_iter') as mock_process_iter:
-            # Mock some processes
-            mock_proc1 = Mock()
-            mock_proc1.info = {
-                'pid': 1234,
-                'ppid': 1,
-                'name': 'test_process',
-                'username': 'testuser',
-                'cmdline': ['./test_program', '--arg1']
-            }
-            
-            mock_proc2 = Mock()
-            mock_proc2.info = {
-                'pid': 5678,
-                'ppid': 1234,
-                'name': 'child_process',
-                'username': 'testuser',
-                'cmdline': ['./child_program']
-            }
-            
-            mock_process_iter.return_value = [mock_proc1, mock_proc2]
+        # Mock some processes as _iter_proc_basic rows: (pid, name, username, create_time)
+        proc_rows = [
+            (1234, 'test_process', 'testuser', 1642248000.0),
+            (5678, 'child_process', 'testuser', 1642248001.0),
+        ]
+        
+        # The fallback scans /proc through _iter_proc_basic
+        with patch('slurm_integration._iter_proc_basic', return_value=iter(proc_rows)):
+            jobs = self.slurm._get_fallback_jobs()
+        
+        # Should find at least one job group
+        self.assertGreater(len(jobs), 0)
+    
+    def test_read_authkey_requires_private_file(self):
+        """Test that the cache server key is only read from a 0600 file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            key_path = os.path.join(tmp, 'authkey')
+            with open(key_path, 'w') as f:
+                f.write('secret\n')
             
-            jobs = self.slurm._fallback_get_jobs()
+            os.chmod(key_path, 0o644)
+            with self.assertRaises(PermissionError):
+                _read_authkey(key_path)
             
-            # Should find at least one job group
-            self.assertGreater(len(jobs), 0)
+            os.chmod(key_path, 0o600)
+            self.assertEqual(_read_authkey(key_path), b'secret')
+    
+    def test_cache_server_failure_falls_back_to_slurm(self):
+        """Test that an unusable cache server makes lookups query Slurm directly"""
+        slurm = SlurmIntegration({'cache_server': '/nonexistent/slurm.sock'})
+        slurm._slurm_available = True
+        self.mock_popen.side_effect = lambda *a, **k: FakePopen(
+            "12345,test_job,user1,R,1:02:03,node01,16,4G,compute\n", **k
+        )
+        
+        jobs = slurm.get_job_info(job_id='12345')
+        
+        self.assertEqual([job['job_id'] for job in jobs], ['12345'])
+    
+    def test_concurrent_lookups_share_one_proc_sweep(self):
+        """Test that parallel PID lookups rebuild a stale /proc index only once"""
+        sweeps = []
+        
+        def slow_sweep():
+            sweeps.append(1)
+            time.sleep(0.05)
+            return {100: '1', 101: '2'}
+        
+        with patch.object(self.slurm, '_get_sstat_pids', return_value={}), \
+             patch.object(self.slurm, '_get_pids_from_cgroup', side_effect=lambda job_id: set()), \
+             patch.object(self.slurm, '_scan_proc_cgroups', side_effect=slow_sweep):
+            pids = self.slurm._get_job_pids_concurrently(['1', '2', '3', '4'])
+        
+        self.assertEqual(len(sweeps), 1)
+        self.assertEqual(pids['1'], {100})
+        self.assertEqual(pids['3'], set())
+    
+    def test_fallback_reads_each_proc_file_once(self):
+        """Test that the fallback scan reads status and stat once per PID"""
+        procs = {1234: 'test_process', 5678: 'child process'}
+        files = {}
+        for pid, name in procs.items():
+            files[f'/proc/{pid}/status'] = f'Name:\t{name}\nUid:\t1000\t1000\t1000\t1000\n'.encode()
+            stat_fields = ['S'] + ['0'] * 18 + ['100', '0', '0']
+            files[f'/proc/{pid}/stat'] = f'{pid} ({name}) {" ".join(stat_fields)}\n'.encode()
+        
+        entries = [FakeDirEntry(name) for name in ('self', 'meminfo', *map(str, procs))]
+        
+        with patch('os.scandir', return_value=contextlib.nullcontext(entries)), \
+             patch('slurm_integration._read_file', side_effect=files.__getitem__) as mock_read:
+            jobs = self.slurm._get_fallback_jobs()
+        
+        self.assertEqual([job.name for job in jobs], list(procs.values()))
+        self.assertEqual(mock_read.call_count, 2 * len(procs))
+
+@unittest.skipUnless(_HAS_SLURM, 'slurm not installed')
+class TestSlurmLive(unittest.TestCase):
+    """
+    Test SlurmIntegration against the local Slurm installation
+    """
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.slurm = SlurmIntegration({})
+    
+    def test_slurm_available(self):
+        """Test that Slurm is detected"""
+        self.assertTrue(self.slurm.slurm_available)
+    
+    def test_get_running_jobs(self):
+        """Test that every running job has a job ID and an owner"""
+        for job in self.slurm.get_running_jobs():
+            self.assertTrue(job['job_id'])
+            self.assertTrue(job['user'])
 
 class TestConfigurationLoading(unittest.TestCase):
     """
     Test configuration loading and validation
     """
     
+    @classmethod
+    def setUpClass(cls):
+        """Parse the configuration files once for the whole class"""
+        cls._sample_cfg = load_yaml(PROJECT_ROOT / 'config' / 'monitor_config.yaml')
+        cls._test_cfg = load_yaml(PROJECT_ROOT / 'data' / 'test_data' / 'test_config.yaml')
+    
     def test_load_sample_config(self):
         """Test loading the sample configuration file"""
-        config_path = Path(__file__).parent.parent / 'config' / 'monitor_config.yaml'
+        config = self._sample_cfg
         
-        if config_path.exists():
-            import yaml
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
+        if config is not None:
             # Check that main sections exist
             self.assertIn('ebpf', config)
             self.assertIn('slurm', config)
@@ -353,13 +736,9 @@ class TestConfigurationLoading(unittest.TestCase):
     
     def test_load_test_config(self):
         """Test loading the test configuration file"""
-        config_path = Path(__file__).parent.parent / 'data' / 'test_data' / 'test_config.yaml'
+        config = self._test_cfg
         
-        if config_path.exists():
-            import yaml
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
+        if config is not None:
             # Check test-specific sections
             self.assertIn('test_settings', config)
             self.assertIn('development', config)
@@ -375,14 +754,16 @@ class TestSampleDataLoading(unittest.TestCase):
     Test loading and validation of sample data
     """
     
+    @classmethod
+    def setUpClass(cls):
+        """Parse the sample job data once for the whole class"""
+        cls._sample_data = load_json(PROJECT_ROOT / 'data' / 'sample_outputs' / 'sample_job_data.json')
+    
     def test_load_sample_job_data(self):
         """Test loading sample job data"""
-        sample_path = Path(__file__).parent.parent / 'data' / 'sample_outputs' / 'sample_job_data.json'
+        data = self._sample_data
         
-        if sample_path.exists():
-            with open(sample_path, 'r') as f:
-                data = json.load(f)
-            
+        if data is not None:
             # Check main structure
             self.assertIn('monitoring_session', data)
             self.assertIn('jobs', data)
@@ -426,54 +807,85 @@ class TestUtilityFunctions(unittest.TestCase):
         
         def format_bytes(bytes_val):
             """Simple byte formatter for testing"""
-            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                if bytes_val < 1024.0:
-                    return f"{bytes_val:.1f} {unit}"
-                bytes_val /= 1024.0
-            return f"{bytes_val:.1f} PB"
+            unit = min(max(0, (bytes_val.bit_length() - 1) // 10), len(BYTE_UNITS) - 1)
+            return f"{bytes_val / (1 << (unit * 10)):.1f} {BYTE_UNITS[unit]}"
         
+        self.assertEqual(format_bytes(0), "0.0 B")
+        self.assertEqual(format_bytes(1023), "1023.0 B")
         self.assertEqual(format_bytes(1024), "1.0 KB")
         self.assertEqual(format_bytes(1048576), "1.0 MB")
         self.assertEqual(format_bytes(1073741824), "1.0 GB")
+        self.assertEqual(format_bytes(1 << 50), "1.0 PB")
+        self.assertEqual(format_bytes(1 << 60), "1024.0 PB")
     
     def test_validate_job_id(self):
         """Test job ID validation"""
         def validate_job_id(job_id):
             """Simple job ID validator for testing"""
-            if not job_id:
-                return False
-            if not isinstance(job_id, str):
-                return False
-            if not job_id.isdigit():
+            if not job_id or not isinstance(job_id, str) or not job_id.isascii():
                 return False
-            return True
+            return not job_id.encode('ascii').translate(None, _DIGITS)
         
         self.assertTrue(validate_job_id("12345"))
         self.assertFalse(validate_job_id(""))
         self.assertFalse(validate_job_id("abc"))
+        self.assertFalse(validate_job_id("123a"))
+        self.assertFalse(validate_job_id("\u0661\u0662\u0663"))
         self.assertFalse(validate_job_id(None))
 
+class TimingTestResult(unittest.TextTestResult):
+    """TextTestResult that also records each test's duration and outcome"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = []
+        self._started = 0
+        self._outcome = 'success'
+    
+    def startTest(self, test):
+        self._outcome = 'success'
+        self._started = time.perf_counter_ns()
+        super().startTest(test)
+    
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.timings.append((test.id(), time.perf_counter_ns() - self._started, self._outcome))
+    
+    def addFailure(self, test, err):
+        self._outcome = 'failure'
+        super().addFailure(test, err)
+    
+    def addError(self, test, err):
+        self._outcome = 'error'
+        super().addError(test, err)
+    
+    def addSkip(self, test, reason):
+        self._outcome = 'skipped'
+        super().addSkip(test, reason)
+    
+    def addExpectedFailure(self, test, err):
+        self._outcome = 'expected_failure'
+        super().addExpectedFailure(test, err)
+    
+    def addUnexpectedSuccess(self, test):
+        self._outcome = 'unexpected_success'
+        super().addUnexpectedSuccess(test)
+    
+    def write_jsonl(self, path):
+        """Write one {"test", "duration_ns", "outcome"} JSON object per line"""
+        with open(path, 'wb') as f:
+            for test_id, duration_ns, outcome in self.timings:
+                f.write(dumps({'test': test_id, 'duration_ns': duration_ns, 'outcome': outcome}) + b'\n')
+
 def create_test_suite():
     """
     Create a test suite with all test cases
     """
-    suite = unittest.TestSuite()
-    
-    # Add test classes
-    test_classes = [
-        TestJobAnalyzer,
-        TestJobClassifier,
-        TestSlurmIntegration,
-        TestConfigurationLoading,
-        TestSampleDataLoading,
-        TestUtilityFunctions
-    ]
-    
-    for test_class in test_classes:
-        tests = unittest.TestLoader().loadTestsFromTestCase(test_class)
-        suite.addTests(tests)
-    
-    return suite
+    return unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
+
+def _last_line(traceback):
+    """Last line of a formatted traceback (the exception message)"""
+    return traceback.rsplit('\n', 2)[-2] if '\n' in traceback else traceback
 
 def main():
     """
@@ -490,7 +902,7 @@ def main():
     
     # Create and run test suite
     suite = create_test_suite()
-    runner = unittest.TextTestRunner(verbosity=2)
+    runner = unittest.TextTestRunner(verbosity=2, resultclass=TimingTestResult)
     result = runner.run(suite)
     
     # Print summary
@@ -503,12 +915,18 @@ def main():
     if result.failures:
         print("\nFailures:")
         for test, traceback in result.failures:
-            print(f"  - {test}: {traceback.split('\n')[-2]}")
+            print(f"  - {test}: {_last_line(traceback)}")
     
     if result.errors:
         print("\nErrors:")
         for test, traceback in result.errors:
-            print(f"  - {test}: {traceback.split('\n')[-2]}")
+            print(f"  - {test}: {_last_line(traceback)}")
+    
+    # Machine-readable per-test timings for CI dashboards
+    timings_path = os.environ.get('TEST_TIMINGS_JSONL')
+    if timings_path:
+        result.write_jsonl(timings_path)
+        print(f"\nTest timings written to {timings_path}")
     
     # Return exit code
     return 0 if result.wasSuccessful() else 1